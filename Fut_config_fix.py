@@ -3,37 +3,41 @@
 # ... existing config ...
 
 # ============================================================================
-# FUTURES EXCHANGE MAPPING (v15D FIX)
+# FUTURES METADATA (v15D FIX)
 # ============================================================================
 
-FUTURES_EXCHANGES = {
-    'NQ': 'CME',
-    'ES': 'CME',
-    'RTY': 'CME',
-    'YM': 'CBOT',
-    'CL': 'NYMEX',
-    'GC': 'COMEX',
-    'ZB': 'CBOT',
-    'ZN': 'CBOT',
-    'ZF': 'CBOT',
-    'ZT': 'CBOT',
-    'SI': 'COMEX',
-    'HG': 'COMEX',
-    'NG': 'NYMEX',
-    'HO': 'NYMEX',
-    'RB': 'NYMEX',
-    'ZC': 'CBOT',
-    'ZS': 'CBOT',
-    'ZW': 'CBOT',
-}
+from types import MappingProxyType
 
-# Existing multipliers section
-FUTURES_MULTIPLIERS = {
-    'NQ': 20,
-    'ES': 50,
-    'CL': 1000,
-    'GC': 100,
-    'ZB': 1000,
-    'RTY': 50,
-    'YM': 5,
+# One record per root: (exchange, multiplier). Single source of truth so the
+# exchange and multiplier tables can't drift apart.
+_FUTURES_META = {
+    'NQ': ('CME', 20),
+    'ES': ('CME', 50),
+    'RTY': ('CME', 50),
+    'YM': ('CBOT', 5),
+    'CL': ('NYMEX', 1000),
+    'GC': ('COMEX', 100),
+    'ZB': ('CBOT', 1000),
+    'ZN': ('CBOT', 1000),
+    'ZF': ('CBOT', 1000),
+    'ZT': ('CBOT', 2000),
+    'SI': ('COMEX', 5000),
+    'HG': ('COMEX', 25000),
+    'NG': ('NYMEX', 10000),
+    'HO': ('NYMEX', 42000),
+    'RB': ('NYMEX', 42000),
+    'ZC': ('CBOT', 50),
+    'ZS': ('CBOT', 50),
+    'ZW': ('CBOT', 50),
 }
+FUTURES_META = MappingProxyType(_FUTURES_META)
+
+
+def futures_meta(symbol):
+    """Get (exchange, multiplier) for a futures root, defaulting to CME x1."""
+    return _FUTURES_META.get(symbol, ('CME', 1))
+
+
+# Existing exchange/multiplier tables - derived views of FUTURES_META
+FUTURES_EXCHANGES = {sym: exch for sym, (exch, _) in _FUTURES_META.items()}
+FUTURES_MULTIPLIERS = {sym: mult for sym, (_, mult) in _FUTURES_META.items()}
@@ -1,14 +1,25 @@
 # dashboard.py - Add these endpoints to your Flask dashboard
 
-from flask import Flask, jsonify, request
+import dataclasses
+import json
+import pathlib
+import time
+
+import numpy as np
+from flask import Flask, Response, request, stream_with_context
+
+try:
+    import orjson
+    _ORJSON_AVAILABLE = True
+except Exception:
+    _ORJSON_AVAILABLE = False
 from config import (
     MAX_IB_SUBSCRIPTIONS,
     get_scanner_capacity,
     subscription_status,
-    PRIORITY_POSITION,
-    PRIORITY_SCANNER_TOP,
-    PRIORITY_SCANNER_NORMAL
+    PRIORITY_SCANNER
 )
+from state_bus import STATE
 
 app = Flask(__name__)
 
@@ -17,154 +28,319 @@ app = Flask(__name__)
 # scanner: BreakoutScanner
 # get_position_symbols(): function to get current positions
 
+# Position symbols change rarely but the dashboard polls every few seconds;
+# reuse one lookup for bursts of requests within the TTL window.
+_POS_TTL = 1.0
+# 'val' is (frozenset, sorted tuple), replaced as one object so readers
+# never pair a set with another refresh's sort
+_POS_CACHE = {'ts': 0.0, 'val': (frozenset(), ())}
+
+
+def _pos_snapshot() -> tuple:
+    """(position symbols, same symbols sorted), cached for _POS_TTL seconds."""
+    now = time.monotonic()
+    c = _POS_CACHE
+    if now - c['ts'] > _POS_TTL:
+        val = frozenset(get_position_symbols())
+        c['val'] = (val, tuple(sorted(val)))
+        c['ts'] = now
+    return c['val']
+
+
+def _pos_syms() -> frozenset:
+    """Get position symbols, cached for _POS_TTL seconds."""
+    return _pos_snapshot()[0]
+
+
+def _dumps(obj) -> bytes:
+    """Serialize obj to JSON bytes (orjson when installed)."""
+    if _ORJSON_AVAILABLE:
+        return orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(obj).encode('utf-8')
+
+
+def _json(obj, code: int = 200) -> Response:
+    """Serialize obj to a JSON response."""
+    return _json_body(_dumps(obj), code)
+
+
+def _json_body(body: bytes, code: int = 200) -> Response:
+    """Wrap already-serialized JSON bytes in a response."""
+    return Response(body, status=code, mimetype='application/json')
+
+
+# Capacity section (payload, serialized payload), shared by concurrent
+# pollers of /capacity and /batch
+_CAP_TTL = 1.0
+_CAP_CACHE = {'ts': 0.0, 'entry': None}
+
+# Below this many tickers a plain loop beats the numpy setup cost
+_VECTORIZE_MIN_TICKERS = 32
+
+
+def _now_ms() -> int:
+    """Wall-clock timestamp in integer milliseconds for response bodies."""
+    return time.time_ns() // 1_000_000
+
+
+def _invalidate_pos_syms():
+    """Force the next _pos_syms() call to refetch positions."""
+    _POS_CACHE['ts'] = 0.0
+
+
+def _invalidate_capacity():
+    """Drop the cached capacity section after subscriptions change."""
+    _CAP_CACHE['entry'] = None
+
+
+def _status_payload(position_symbols, current_subs: int) -> dict:
+    """Subscription status summary."""
+    return dataclasses.asdict(subscription_status(current_subs, len(position_symbols)))
+
+
+def _iter_detail_records(position_symbols, subs_snapshot):
+    """Yield one detail record per symbol in a snapshot_subs() result."""
+    # Hoist attribute lookups out of the per-symbol loop; one tracker
+    # probe per symbol yields both priority and sub_time
+    get_entry = market_bus._tracker.get_entry
+    tickers_get = market_bus.tickers.get
+    no_data = {}
+    
+    for symbol, _ in subs_snapshot:
+        e = get_entry(symbol)
+        priority = e.priority if e else 0
+        yield {
+            "symbol": symbol,
+            "priority": priority,
+            "last_price": tickers_get(symbol, no_data).get('last'),
+            "type": "position" if symbol in position_symbols else
+                    "scanner" if priority <= PRIORITY_SCANNER else "watchlist",
+            "subscription_time": e.sub_time if e else 0
+        }
+
+
+def _iter_details_ndjson(position_symbols, subs_snapshot):
+    """Yield each detail record as one serialized JSON line."""
+    for rec in _iter_detail_records(position_symbols, subs_snapshot):
+        yield _dumps(rec) + b'\n'
+
+
+def _details_payload(position_symbols, subs_snapshot) -> dict:
+    """Per-symbol subscription details from a snapshot_subs() result."""
+    symbols_info = list(_iter_detail_records(position_symbols, subs_snapshot))
+    
+    return {
+        "symbols": symbols_info,
+        "total": len(symbols_info)
+    }
+
+
+def _capacity_payload(position_symbols, sorted_symbols: tuple, current_subs: int) -> dict:
+    """Subscription capacity and utilization (sorted_symbols: position_symbols in order)."""
+    position_count = len(position_symbols)
+    capacity = get_scanner_capacity(position_count)
+    
+    # Calculate utilization
+    utilization = (current_subs / MAX_IB_SUBSCRIPTIONS) * 100
+    
+    # Get scanner info
+    scanner_subs = current_subs - position_count
+    scanner_utilization = (scanner_subs / capacity * 100) if capacity > 0 else 0
+    
+    return {
+        "total_subscriptions": current_subs,
+        "limit": MAX_IB_SUBSCRIPTIONS,
+        "utilization_pct": round(utilization, 1),
+        "positions": {
+            "count": position_count,
+            "symbols": sorted_symbols
+        },
+        "scanner": {
+            "capacity": capacity,
+            "active": scanner_subs,
+            "utilization_pct": round(scanner_utilization, 1),
+            "available": max(0, capacity - scanner_subs)
+        },
+        "status": "over_limit" if current_subs > MAX_IB_SUBSCRIPTIONS else
+                 "near_limit" if current_subs >= 95 else "ok"
+    }
+
+
+def _capacity_entry() -> tuple:
+    """(payload, serialized payload) of the capacity section, cached for _CAP_TTL seconds."""
+    now = time.monotonic()
+    c = _CAP_CACHE
+    entry = c['entry']
+    if entry is None or now - c['ts'] >= _CAP_TTL:
+        position_symbols, sorted_symbols = _pos_snapshot()
+        data = _capacity_payload(position_symbols, sorted_symbols, market_bus.n_subs)
+        entry = c['entry'] = (data, _dumps(data))
+        c['ts'] = now
+    return entry
+
 
 @app.route('/api/subscriptions', methods=['GET'])
 def get_subscriptions():
     """Get subscription status summary."""
     try:
-        position_symbols = get_position_symbols()
-        current_subs = len(market_bus._subs)
+        position_symbols = _pos_syms()
+        current_subs = market_bus.n_subs
         
-        status = subscription_status(current_subs, len(position_symbols))
-        
-        return jsonify({
+        return _json({
             "success": True,
-            "data": status,
-            "timestamp": time.time()
+            "data": _status_payload(position_symbols, current_subs),
+            "timestamp": _now_ms()
         })
     
     except Exception as e:
-        return jsonify({
+        return _json({
             "success": False,
             "error": str(e)
-        }), 500
+        }, 500)
 
 
 @app.route('/api/subscriptions/details', methods=['GET'])
 def get_subscription_details():
     """Get detailed subscription information."""
     try:
-        position_symbols = get_position_symbols()
-        
-        # Build detailed list
-        symbols_info = []
+        # frozenset: hash lookup per subscription instead of a list scan
+        pos_set = _pos_syms()
+        subs_snapshot = market_bus.snapshot_subs()
         
-        for symbol, (contract, ticker) in market_bus._subs.items():
-            priority = market_bus._tracker.get_priority(symbol)
-            last_price = None
-            
-            # Get last price
-            if symbol in market_bus.tickers:
-                last_price = market_bus.tickers[symbol].get('last')
-            
-            # Determine type
-            if symbol in position_symbols:
-                sub_type = "position"
-            elif priority >= PRIORITY_SCANNER_TOP:
-                sub_type = "scanner_top"
-            else:
-                sub_type = "scanner"
-            
-            symbols_info.append({
-                "symbol": symbol,
-                "priority": priority,
-                "last_price": last_price,
-                "type": sub_type,
-                "subscription_time": market_bus._tracker.subscription_times.get(symbol, 0)
-            })
+        # Same record generator as the .ndjson stream, serialized per record
+        # and joined into the usual envelope
+        lines = [_dumps(rec) for rec in _iter_detail_records(pos_set, subs_snapshot)]
+        return _json_body(b''.join((
+            b'{"success":true,"data":{"symbols":[',
+            b','.join(lines),
+            b'],"total":', str(len(lines)).encode(),
+            b'},"timestamp":', str(_now_ms()).encode(),
+            b'}'
+        )))
+    
+    except Exception as e:
+        return _json({
+            "success": False,
+            "error": str(e)
+        }, 500)
+
+
+@app.route('/api/subscriptions/details.ndjson', methods=['GET'])
+def stream_subscription_details():
+    """Stream subscription details, one JSON record per line."""
+    try:
+        pos_set = _pos_syms()
+        subs_snapshot = market_bus.snapshot_subs()
         
-        return jsonify({
-            "success": True,
-            "data": {
-                "symbols": symbols_info,
-                "total": len(symbols_info)
-            },
-            "timestamp": time.time()
-        })
+        return Response(
+            stream_with_context(_iter_details_ndjson(pos_set, subs_snapshot)),
+            mimetype='application/x-ndjson'
+        )
     
     except Exception as e:
-        return jsonify({
+        return _json({
             "success": False,
             "error": str(e)
-        }), 500
+        }, 500)
 
 
 @app.route('/api/subscriptions/capacity', methods=['GET'])
 def get_subscription_capacity():
-    """Get subscription capacity information."""
+    """Get subscription capacity information (cached for _CAP_TTL seconds)."""
+    try:
+        # Cached section wrapped in a fresh envelope
+        return _json_body(b''.join((
+            b'{"success":true,"data":', _capacity_entry()[1],
+            b',"timestamp":', str(_now_ms()).encode(),
+            b'}'
+        )))
+    
+    except Exception as e:
+        return _json({
+            "success": False,
+            "error": str(e)
+        }, 500)
+
+
+_BATCH_SECTIONS = ('status', 'details', 'capacity')
+
+
+@app.route('/api/subscriptions/batch', methods=['GET'])
+def get_subscription_batch():
+    """
+    Status, details and capacity from one consistent snapshot.
+    
+    Query: ?include=status,details,capacity (default: all sections)
+    """
     try:
-        position_symbols = get_position_symbols()
-        position_count = len(position_symbols)
-        capacity = get_scanner_capacity(position_count)
-        current_subs = len(market_bus._subs)
+        include = request.args.get('include', ','.join(_BATCH_SECTIONS))
+        sections = [s.strip() for s in include.split(',') if s.strip()]
+        unknown = [s for s in sections if s not in _BATCH_SECTIONS]
+        if unknown:
+            return _json({
+                "success": False,
+                "error": f"Unknown section(s): {', '.join(unknown)}"
+            }, 400)
         
-        # Calculate utilization
-        utilization = (current_subs / MAX_IB_SUBSCRIPTIONS) * 100
+        position_symbols = _pos_syms()
+        subs_snapshot = market_bus.snapshot_subs()
+        current_subs = len(subs_snapshot)
         
-        # Get scanner info
-        scanner_subs = current_subs - position_count
-        scanner_utilization = (scanner_subs / capacity * 100) if capacity > 0 else 0
+        data = {}
+        if 'status' in sections:
+            data['status'] = _status_payload(position_symbols, current_subs)
+        if 'details' in sections:
+            data['details'] = _details_payload(position_symbols, subs_snapshot)
+        if 'capacity' in sections:
+            # Shared with /capacity pollers; the dashboard polls this path
+            data['capacity'] = _capacity_entry()[0]
         
-        return jsonify({
+        return _json({
             "success": True,
-            "data": {
-                "total_subscriptions": current_subs,
-                "limit": MAX_IB_SUBSCRIPTIONS,
-                "utilization_pct": round(utilization, 1),
-                "positions": {
-                    "count": position_count,
-                    "symbols": sorted(position_symbols)
-                },
-                "scanner": {
-                    "capacity": capacity,
-                    "active": scanner_subs,
-                    "utilization_pct": round(scanner_utilization, 1),
-                    "available": max(0, capacity - scanner_subs)
-                },
-                "status": "over_limit" if current_subs > MAX_IB_SUBSCRIPTIONS else
-                         "near_limit" if current_subs >= 95 else "ok"
-            },
-            "timestamp": time.time()
+            "data": data,
+            "timestamp": _now_ms()
         })
     
     except Exception as e:
-        return jsonify({
+        return _json({
             "success": False,
             "error": str(e)
-        }), 500
+        }, 500)
 
 
 @app.route('/api/subscriptions/cleanup', methods=['POST'])
 def force_cleanup():
     """Force cleanup of excess subscriptions."""
     try:
-        position_symbols = get_position_symbols()
+        _invalidate_pos_syms()
+        position_symbols, sorted_symbols = _pos_snapshot()
         
         # Get current status
-        before = len(market_bus._subs)
+        before = market_bus.n_subs
         
         # Run cleanup
         removed = market_bus.check_and_cleanup_subscriptions(position_symbols)
+        _invalidate_capacity()
         
         # Get new status
-        after = len(market_bus._subs)
+        after = market_bus.n_subs
         
-        return jsonify({
+        return _json({
             "success": True,
             "data": {
                 "before": before,
                 "after": after,
                 "removed": removed,
-                "position_symbols": sorted(position_symbols)
+                "position_symbols": sorted_symbols
             },
-            "timestamp": time.time()
+            "timestamp": _now_ms()
         })
     
     except Exception as e:
-        return jsonify({
+        return _json({
             "success": False,
             "error": str(e)
-        }), 500
+        }, 500)
 
 
 @app.route('/api/subscriptions/unsubscribe/<symbol>', methods=['DELETE'])
@@ -173,178 +349,128 @@ def unsubscribe_symbol(symbol: str):
     try:
         symbol = symbol.upper()
         
-        # Check if it's a position (can't unsubscribe)
-        position_symbols = get_position_symbols()
-        if symbol in position_symbols:
-            return jsonify({
-                "success": False,
-                "error": f"{symbol} is a position and cannot be unsubscribed"
-            }), 400
-        
-        # Check if subscribed
+        # Check if subscribed first - stale dashboard clicks fail here
+        # without touching the positions lookup
         if symbol not in market_bus._subs:
-            return jsonify({
+            return _json({
                 "success": False,
                 "error": f"{symbol} is not subscribed"
-            }), 404
+            }, 404)
+        
+        # Check if it's a position (can't unsubscribe)
+        if symbol in _pos_syms():
+            return _json({
+                "success": False,
+                "error": f"{symbol} is a position and cannot be unsubscribed"
+            }, 400)
         
         # Unsubscribe
         market_bus.unsubscribe(symbol)
+        _invalidate_capacity()
         
-        return jsonify({
+        return _json({
             "success": True,
             "data": {
                 "symbol": symbol,
                 "action": "unsubscribed",
-                "remaining_subscriptions": len(market_bus._subs)
+                "remaining_subscriptions": market_bus.n_subs
             },
-            "timestamp": time.time()
+            "timestamp": _now_ms()
         })
     
     except Exception as e:
-        return jsonify({
+        return _json({
             "success": False,
             "error": str(e)
-        }), 500
+        }, 500)
 
 
 @app.route('/api/health', methods=['GET'])
 def health_check():
     """Enhanced health check with subscription info."""
     try:
-        position_symbols = get_position_symbols()
-        status = subscription_status(len(market_bus._subs), len(position_symbols))
+        position_symbols = _pos_syms()
+        status = subscription_status(market_bus.n_subs, len(position_symbols))
         
         # IB connection
         ib_connected = market_bus.ib.isConnected() if market_bus.ib else False
         
-        # Get latest tick age
-        tick_ages = []
-        for symbol, data in market_bus.tickers.items():
-            ts = data.get('ts')
-            if ts:
-                age = time.time() - ts
-                tick_ages.append(age)
-        
-        avg_tick_age = sum(tick_ages) / len(tick_ages) if tick_ages else None
+        # Get latest tick age and data coverage from a snapshot
+        tickers = market_bus.snapshot_tickers()
+        now = time.time()
+        if len(tickers) >= _VECTORIZE_MIN_TICKERS:
+            # One pass: (ts or NaN, has last) per ticker
+            cols = np.fromiter(
+                ((d.get('ts') or np.nan, 1.0 if d.get('last') else 0.0) for _, d in tickers),
+                dtype=np.dtype((np.float64, 2)), count=len(tickers)
+            )
+            ts_arr = cols[:, 0]
+            ts_arr = ts_arr[~np.isnan(ts_arr)]
+            avg_tick_age = float((now - ts_arr).mean()) if ts_arr.size else None
+            symbols_with_data = int(cols[:, 1].sum())
+        else:
+            age_sum = 0.0
+            age_n = 0
+            symbols_with_data = 0
+            for symbol, data in tickers:
+                ts = data.get('ts')
+                if ts:
+                    age_sum += now - ts
+                    age_n += 1
+                if data.get('last'):
+                    symbols_with_data += 1
+            
+            avg_tick_age = age_sum / age_n if age_n else None
         
-        return jsonify({
+        return _json({
             "success": True,
             "data": {
-                "status": "healthy" if not status['over_limit'] else "degraded",
+                "status": "healthy" if not status.over_limit else "degraded",
                 "ib_connected": ib_connected,
                 "subscriptions": {
-                    "current": status['current'],
-                    "limit": status['limit'],
-                    "status": status['status'],
-                    "capacity": status['capacity']
+                    "current": status.current,
+                    "limit": status.limit,
+                    "status": status.status,
+                    "capacity": status.capacity
                 },
                 "data_quality": {
                     "avg_tick_age_s": round(avg_tick_age, 1) if avg_tick_age else None,
-                    "symbols_with_data": len([s for s, d in market_bus.tickers.items() if d.get('last')])
+                    "symbols_with_data": symbols_with_data
                 },
-                "uptime": getattr(STATE, 'uptime_seconds', 0)
+                "uptime": STATE.uptime_seconds()
             },
-            "timestamp": time.time()
+            "timestamp": _now_ms()
         })
     
     except Exception as e:
-        return jsonify({
+        return _json({
             "success": False,
             "error": str(e)
-        }), 500
-
-
-# Example integration in main dashboard HTML
-DASHBOARD_HTML_ADDITION = """
-<!-- Add to your dashboard.html -->
-<div class="subscription-status" id="subscription-status">
-    <h3>Subscription Status</h3>
-    <div class="status-bar">
-        <div id="sub-usage-bar" class="usage-bar"></div>
-    </div>
-    <div class="status-details">
-        <span id="sub-current">0</span> / <span id="sub-limit">100</span> subscriptions
-        (<span id="sub-pct">0%</span>)
-    </div>
-    <div class="capacity-info">
-        <small>
-            Positions: <span id="sub-positions">0</span> | 
-            Capacity: <span id="sub-capacity">0</span> slots
-        </small>
-    </div>
-</div>
-
-<script>
-// Add to your dashboard JavaScript
-function updateSubscriptionStatus() {
-    fetch('/api/subscriptions/capacity')
-        .then(response => response.json())
-        .then(data => {
-            if (data.success) {
-                const info = data.data;
-                document.getElementById('sub-current').textContent = info.total_subscriptions;
-                document.getElementById('sub-limit').textContent = info.limit;
-                document.getElementById('sub-pct').textContent = info.utilization_pct + '%';
-                document.getElementById('sub-positions').textContent = info.positions.count;
-                document.getElementById('sub-capacity').textContent = info.scanner.available;
-                
-                // Update progress bar
-                const bar = document.getElementById('sub-usage-bar');
-                bar.style.width = info.utilization_pct + '%';
-                
-                // Color code by status
-                if (info.status === 'over_limit') {
-                    bar.className = 'usage-bar danger';
-                } else if (info.status === 'near_limit') {
-                    bar.className = 'usage-bar warning';
-                } else {
-                    bar.className = 'usage-bar success';
-                }
-            }
-        })
-        .catch(err => console.error('Failed to fetch subscription status:', err));
-}
-
-// Update every 5 seconds
-setInterval(updateSubscriptionStatus, 5000);
-updateSubscriptionStatus(); // Initial load
-</script>
-
-<style>
-.subscription-status {
-    padding: 15px;
-    background: #f5f5f5;
-    border-radius: 8px;
-    margin: 10px 0;
-}
-
-.usage-bar {
-    height: 20px;
-    border-radius: 4px;
-    transition: width 0.3s, background-color 0.3s;
-}
-
-.usage-bar.success { background-color: #28a745; }
-.usage-bar.warning { background-color: #ffc107; }
-.usage-bar.danger { background-color: #dc3545; }
-
-.status-bar {
-    background: #e0e0e0;
-    border-radius: 4px;
-    height: 20px;
-    margin: 10px 0;
-    overflow: hidden;
-}
-</style>
-"""
+        }, 500)
+
+
+# Example integration in main dashboard HTML (dashboard_addition.html),
+# loaded on first use rather than at import
+_DASHBOARD_HTML_ADDITION = None
+
+
+def dashboard_html_addition() -> str:
+    """Get the dashboard HTML/JS snippet for the subscription panel."""
+    global _DASHBOARD_HTML_ADDITION
+    if _DASHBOARD_HTML_ADDITION is None:
+        path = pathlib.Path(__file__).with_name('dashboard_addition.html')
+        _DASHBOARD_HTML_ADDITION = path.read_text(encoding='utf-8')
+    return _DASHBOARD_HTML_ADDITION
+
 
 # Print instructions for adding to dashboard
 if __name__ == '__main__':
     print("Add these endpoints to your Flask dashboard:")
     print("- GET  /api/subscriptions")
     print("- GET  /api/subscriptions/details")
+    print("- GET  /api/subscriptions/details.ndjson")
     print("- GET  /api/subscriptions/capacity")
+    print("- GET  /api/subscriptions/batch?include=status,details,capacity")
     print("- POST /api/subscriptions/cleanup")
     print("- DELETE /api/subscriptions/unsubscribe/<symbol>")
     print("\nEnhanced /api/health endpoint included")
@@ -7,13 +7,20 @@ Run this WHILE QTrade is running.
 
 import requests
 import json
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
 
 DASHBOARD_URL = "http://localhost:8052"
 
+# Reuse one keep-alive connection for all checks
+SESSION = requests.Session()
+SESSION.headers.update({'Accept': 'application/json'})
+SESSION.mount('http://', HTTPAdapter(pool_connections=1, pool_maxsize=4))
+
 def check_status():
     """Check system status."""
     try:
-        r = requests.get(f"{DASHBOARD_URL}/api/status", timeout=5)
+        r = SESSION.get(f"{DASHBOARD_URL}/api/status", timeout=5)
         data = r.json()
         print("\n=== SYSTEM STATUS ===")
         print(f"IB Connected: {data['ib_connected']}")
@@ -29,64 +36,70 @@ def check_status():
         return False
 
 def check_positions():
-    """Check positions."""
+    """Check positions. Returns the report text."""
+    out = []
     try:
-        r = requests.get(f"{DASHBOARD_URL}/api/positions", timeout=5)
+        r = SESSION.get(f"{DASHBOARD_URL}/api/positions", timeout=5)
         data = r.json()
-        print("\n=== POSITIONS ===")
-        print(f"Total: {data['count']}")
-        print(f"Total P&L: ${data['total_pnl']:.2f}")
+        out.append("\n=== POSITIONS ===")
+        out.append(f"Total: {data['count']}")
+        out.append(f"Total P&L: ${data['total_pnl']:.2f}")
         
         if data['positions']:
-            print("\nDetails:")
+            out.append("\nDetails:")
             for pos in data['positions']:
-                print(f"  {pos['symbol']:<6} {pos['sec_type']:<4} qty={pos['qty']:<4} "
-                      f"last=${pos['last'] if pos['last'] else 0:.2f} "
-                      f"pnl=${pos['pnl']:.2f} ({pos['pnl_pct']:.2f}%)")
+                out.append(f"  {pos['symbol']:<6} {pos['sec_type']:<4} qty={pos['qty']:<4} "
+                           f"last=${pos['last'] if pos['last'] else 0:.2f} "
+                           f"pnl=${pos['pnl']:.2f} ({pos['pnl_pct']:.2f}%)")
         else:
-            print("  (No positions)")
+            out.append("  (No positions)")
             
     except Exception as e:
-        print(f"\n❌ ERROR checking positions: {e}")
+        out.append(f"\n❌ ERROR checking positions: {e}")
+    return "\n".join(out)
 
 def check_futures():
-    """Check futures watchlist."""
+    """Check futures watchlist. Returns the report text."""
+    out = []
     try:
-        r = requests.get(f"{DASHBOARD_URL}/api/futures", timeout=5)
+        r = SESSION.get(f"{DASHBOARD_URL}/api/futures", timeout=5)
         data = r.json()
-        print("\n=== FUTURES WATCHLIST ===")
-        print(f"Total: {data['count']}")
+        out.append("\n=== FUTURES WATCHLIST ===")
+        out.append(f"Total: {data['count']}")
         
         if data['futures']:
-            print("\nDetails:")
+            out.append("\nDetails:")
             for fut in data['futures']:
-                print(f"  {fut['symbol']:<6} ${fut['last'] if fut['last'] else 0:.2f} "
-                      f"(mult: {fut['multiplier']}x, age: {fut['age']}s)")
+                out.append(f"  {fut['symbol']:<6} ${fut['last'] if fut['last'] else 0:.2f} "
+                           f"(mult: {fut['multiplier']}x, age: {fut['age']}s)")
         else:
-            print("  (No futures)")
+            out.append("  (No futures)")
             
     except Exception as e:
-        print(f"\n❌ ERROR checking futures: {e}")
+        out.append(f"\n❌ ERROR checking futures: {e}")
+    return "\n".join(out)
 
 def check_scanner():
-    """Check scanner results."""
+    """Check scanner results. Returns the report text."""
+    out = []
     try:
-        r = requests.get(f"{DASHBOARD_URL}/api/scanner", timeout=5)
+        r = SESSION.get(f"{DASHBOARD_URL}/api/scanner", timeout=5)
         data = r.json()
-        print("\n=== SCANNER RESULTS ===")
-        print(f"Total: {data['count']}")
+        out.append("\n=== SCANNER RESULTS ===")
+        out.append(f"Total: {data['count']}")
         
         if data['results']:
-            print("\nTop 5:")
+            out.append("\nTop 5:")
             for result in data['results'][:5]:
                 breakdown = result.get('breakdown', {})
-                print(f"  {result['symbol']:<6} score={result['total_score']:.1f} "
-                      f"grade={result['grade']} last=${result.get('last', 0):.2f}")
+                out.append(f"  {result['symbol']:<6} score={result['total_score']:.1f} "
+                           f"grade={result['grade']} last=${result.get('last', 0):.2f}")
         else:
-            print("  (No results - waiting for scan or market open)")
+            out.append("  (No results - waiting for scan or market open)")
             
     except Exception as e:
-        print(f"\n❌ ERROR checking scanner: {e}")
+        out.append(f"\n❌ ERROR checking scanner: {e}")
+    return "\n".join(out)
 
 def main():
     print("=" * 60)
@@ -96,9 +109,11 @@ def main():
     if not check_status():
         return
     
-    check_positions()
-    check_futures()
-    check_scanner()
+    # Independent GETs - run them concurrently, print in a fixed order
+    checks = [check_positions, check_futures, check_scanner]
+    with ThreadPoolExecutor(max_workers=len(checks)) as ex:
+        for report in ex.map(lambda check: check(), checks):
+            print(report)
     
     print("\n" + "=" * 60)
     print("Check complete!")
@@ -1,19 +1,48 @@
+import atexit
+import functools
+import time
+
 from ib_insync import IB
-ib = IB()
-ib.connect('127.0.0.1', 7497, clientId=20)
-
-positions = ib.positions()
-print(f'Found {len(positions)} positions:\n')
-
-for p in positions:
-    c = p.contract
-    print(f'Symbol: {c.symbol}')
-    print(f'LocalSymbol: {c.localSymbol}')
-    print(f'SecType: {c.secType}')
-    print(f'LastTrade: {c.lastTradeDateOrContractMonth}')
-    print(f'ConId: {c.conId}')
-    print(f'Exchange: {c.exchange}')
-    print(f'Qty: {p.position}, Avg: {p.avgCost}')
-    print('=' * 40)
-
-ib.disconnect()
\ No newline at end of file
+
+POSITIONS_TTL = 5.0
+_positions_cache = {'ts': 0.0, 'val': []}
+
+
+@functools.lru_cache(maxsize=1)
+def get_ib(host='127.0.0.1', port=7497, client_id=20):
+    """Connect once per process; later calls reuse the same connection."""
+    ib = IB()
+    ib.connect(host, port, clientId=client_id)
+    atexit.register(ib.disconnect)
+    return ib
+
+
+def get_positions(ib):
+    """Positions from IB, cached for POSITIONS_TTL seconds."""
+    now = time.monotonic()
+    if now - _positions_cache['ts'] > POSITIONS_TTL:
+        _positions_cache['val'] = ib.positions()
+        _positions_cache['ts'] = now
+    return _positions_cache['val']
+
+
+def main():
+    ib = get_ib()
+
+    positions = get_positions(ib)
+    print(f'Found {len(positions)} positions:\n')
+
+    for p in positions:
+        c = p.contract
+        print(f'Symbol: {c.symbol}')
+        print(f'LocalSymbol: {c.localSymbol}')
+        print(f'SecType: {c.secType}')
+        print(f'LastTrade: {c.lastTradeDateOrContractMonth}')
+        print(f'ConId: {c.conId}')
+        print(f'Exchange: {c.exchange}')
+        print(f'Qty: {p.position}, Avg: {p.avgCost}')
+        print('=' * 40)
+
+
+if __name__ == '__main__':
+    main()
@@ -5,6 +5,9 @@ Includes all v14 constants + v15 enhancements.
 """
 
 import os
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Mapping, Tuple
 
 # ============================================================================
 # CORE SETTINGS
@@ -22,6 +25,7 @@ LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
 IB_HOST = os.getenv("IB_HOST", "127.0.0.1")
 IB_PORT = int(os.getenv("IB_PORT", "7497"))  # 7497=paper, 7496=live
 IB_CLIENT_ID = int(os.getenv("IB_CLIENT_ID", "1"))
+IB_READONLY = int(os.getenv("IB_READONLY", "1"))  # 1 = skip execution requests on connect
 
 # v14 backward compatibility aliases
 IB_GATEWAY_HOST = IB_HOST
@@ -61,6 +65,33 @@ def get_scanner_capacity(num_positions: int) -> int:
     available = IB_MAX_SUBSCRIPTIONS - reserved
     return max(0, available - 5)  # Keep 5-slot buffer
 
+
+@dataclass(frozen=True, slots=True)
+class SubStatus:
+    """Subscription usage summary (serialize with dataclasses.asdict)."""
+    current: int
+    limit: int
+    positions: int
+    capacity: int
+    status: str
+    over_limit: bool
+    near_limit: bool
+
+
+def subscription_status(current_subs: int, num_positions: int) -> SubStatus:
+    """Summarize subscription usage against the IB limit."""
+    over_limit = current_subs > IB_MAX_SUBSCRIPTIONS
+    near_limit = not over_limit and current_subs >= SCANNER_MAX_WARN_THRESHOLD
+    return SubStatus(
+        current=current_subs,
+        limit=IB_MAX_SUBSCRIPTIONS,
+        positions=num_positions,
+        capacity=get_scanner_capacity(num_positions),
+        status="over_limit" if over_limit else "near_limit" if near_limit else "ok",
+        over_limit=over_limit,
+        near_limit=near_limit,
+    )
+
 # ============================================================================
 # FUTURES WATCHLIST (Always Monitored)
 # ============================================================================
@@ -78,50 +109,44 @@ FUTURES_WATCHLIST = [
 # Futures contract details
 FUTURES_EXCHANGE = 'CME'
 FUTURES_CURRENCY = 'USD'
-FUTURES_MULTIPLIERS = {
-    'NQ': 20,
-    'ES': 50,
-    'CL': 1000,
-    'GC': 100,
-    'ZB': 1000,
-    'RTY': 50,
-    'YM': 5,
-}
+
 # ============================================================================
-# FUTURES EXCHANGE MAPPING (v15D FIX)
+# FUTURES METADATA (v15D FIX)
 # ============================================================================
 
-FUTURES_EXCHANGES = {
-    'NQ': 'CME',
-    'ES': 'CME',
-    'RTY': 'CME',
-    'YM': 'CBOT',
-    'CL': 'NYMEX',
-    'GC': 'COMEX',
-    'ZB': 'CBOT',
-    'ZN': 'CBOT',
-    'ZF': 'CBOT',
-    'ZT': 'CBOT',
-    'SI': 'COMEX',
-    'HG': 'COMEX',
-    'NG': 'NYMEX',
-    'HO': 'NYMEX',
-    'RB': 'NYMEX',
-    'ZC': 'CBOT',
-    'ZS': 'CBOT',
-    'ZW': 'CBOT',
+# One record per root: (exchange, multiplier). Single source of truth so the
+# exchange and multiplier tables can't drift apart.
+_FUTURES_META = {
+    'NQ': ('CME', 20),
+    'ES': ('CME', 50),
+    'RTY': ('CME', 50),
+    'YM': ('CBOT', 5),
+    'CL': ('NYMEX', 1000),
+    'GC': ('COMEX', 100),
+    'ZB': ('CBOT', 1000),
+    'ZN': ('CBOT', 1000),
+    'ZF': ('CBOT', 1000),
+    'ZT': ('CBOT', 2000),
+    'SI': ('COMEX', 5000),
+    'HG': ('COMEX', 25000),
+    'NG': ('NYMEX', 10000),
+    'HO': ('NYMEX', 42000),
+    'RB': ('NYMEX', 42000),
+    'ZC': ('CBOT', 50),
+    'ZS': ('CBOT', 50),
+    'ZW': ('CBOT', 50),
 }
+FUTURES_META: Mapping[str, Tuple[str, int]] = MappingProxyType(_FUTURES_META)
 
-# Existing multipliers section
-FUTURES_MULTIPLIERS = {
-    'NQ': 20,
-    'ES': 50,
-    'CL': 1000,
-    'GC': 100,
-    'ZB': 1000,
-    'RTY': 50,
-    'YM': 5,
-}
+
+def futures_meta(symbol: str) -> Tuple[str, int]:
+    """Get (exchange, multiplier) for a futures root, defaulting to CME x1."""
+    return _FUTURES_META.get(symbol, (FUTURES_EXCHANGE, 1))
+
+
+# v15 backward compatibility - derived views of FUTURES_META
+FUTURES_EXCHANGES = {sym: exch for sym, (exch, _) in _FUTURES_META.items()}
+FUTURES_MULTIPLIERS = {sym: mult for sym, (_, mult) in _FUTURES_META.items()}
 
 # ============================================================================
 # PROFESSIONAL BREAKOUT SCANNER
@@ -245,6 +270,22 @@ DASHBOARD_PORT = 8052
 DASHBOARD_DEBUG = False
 DASHBOARD_THEME = "light"        # light or dark
 
+# Dashboard server (waitress). Sockets are multiplexed on one I/O thread;
+# only request handling uses the worker pool, and each open /api/stream
+# or /ws client holds one worker.
+DASHBOARD_THREADS = 16
+DASHBOARD_MAX_STREAMS = DASHBOARD_THREADS - 4   # Rest stay free for polls/API
+DASHBOARD_CONNECTION_LIMIT = 1000
+DASHBOARD_KEEPALIVE_SEC = 30     # Idle keep-alive sockets closed after this
+
+# Run the dashboard in its own process, fed through shared memory, so
+# polling clients never contend for the trading process's GIL
+DASHBOARD_PROCESS = int(os.getenv("DASHBOARD_PROCESS", "0"))
+DASHBOARD_SHM_NAME = "qtrade_state"
+DASHBOARD_SHM_SIZE = 4 * 1024 * 1024   # Max published snapshot size (bytes)
+DASHBOARD_SHM_HB_NAME = DASHBOARD_SHM_NAME + "_hb"  # Heartbeat, published on its own
+DASHBOARD_SHM_HB_SIZE = 64 * 1024
+
 # Dashboard refresh rates
 DASHBOARD_REFRESH_MS = 2000      # Refresh every 2 seconds
 DASHBOARD_HEARTBEAT_MS = 1000    # Heartbeat every 1 second
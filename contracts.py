@@ -3,10 +3,26 @@
 Helper functions for identifying and filtering contracts.
 """
 
+import asyncio
 import logging
+import re
+import sys
+import time
+from datetime import datetime
+from typing import Iterable, Iterator
+
+from config import (
+    FUTURES_EXCHANGES, FUTURES_META, FUTURES_MULTIPLIERS as _FUTURES_MULT, futures_meta
+)
 
 logger = logging.getLogger(__name__)
 
+# secType values come from a small fixed set; get_contract_type() interns
+# what it returns so the helpers below can compare by identity
+_STK = sys.intern('STK')
+_FUT = sys.intern('FUT')
+_OPT = sys.intern('OPT')
+
 # Non-tradable symbol patterns
 NON_TRADABLE_PATTERNS = [
     'Q',      # Bankruptcy/delisted (but NOT futures like NQZ5)
@@ -17,7 +33,16 @@ NON_TRADABLE_PATTERNS = [
     'REF',    # Reference symbols
 ]
 
-def looks_nontradable_symbol(symbol: str) -> bool:
+# All substring patterns in one compiled alternation, plus the 'Q' rule:
+# a trailing Q on a symbol longer than 3 chars is a bankruptcy marker
+# (ALPSQ), while QQQ/NQ/NQZ5 are left alone.
+_NT_RE = re.compile(
+    '|'.join(re.escape(p) for p in NON_TRADABLE_PATTERNS if p != 'Q')
+    + r'|^.{3,}Q\Z',
+    re.DOTALL,
+)
+
+def looks_nontradable_symbol(symbol: str, _search=_NT_RE.search) -> bool:
     """
     Check if a symbol looks non-tradable (OTC, delisted, CVR, etc).
     
@@ -36,32 +61,44 @@ def looks_nontradable_symbol(symbol: str) -> bool:
         True
         >>> looks_nontradable_symbol("NQZ5")  # Futures
         False
+    
+    _search is bound at definition time (LOAD_FAST instead of a global
+    lookup per call); callers never pass it.
     """
     if not symbol:
         return True
     
-    symbol_upper = symbol.upper()
-    
-    # Check for explicit non-tradable patterns
-    for pattern in NON_TRADABLE_PATTERNS:
-        if pattern in symbol_upper:
-            # Special case: 'Q' in symbol
-            # Allow futures (NQZ5, QQQ, etc) but block bankruptcy (ALPSQ, etc)
-            if pattern == 'Q':
-                # If Q is at the end and preceded by letters, likely bankruptcy
-                if symbol_upper.endswith('Q') and len(symbol_upper) > 3:
-                    # But allow QQQ, NQ, etc
-                    if symbol_upper not in ['QQQ', 'NQ', 'NQH', 'NQM', 'NQU', 'NQZ']:
-                        # Check if it's a futures code (e.g., NQZ5, ESH5)
-                        if not (len(symbol_upper) >= 3 and symbol_upper[-1].isdigit()):
-                            return True
-            else:
-                return True
-    
-    return False
+    s = symbol.upper()
+    # Every pattern needs one of '.', 'Q', 'R', 'W'; clean tickers like
+    # AAPL/MSFT are rejected with C-level substring checks, no regex
+    if not ('.' in s or 'Q' in s or 'R' in s or 'W' in s):
+        return False
+    return _search(s) is not None
+
+
+# Common futures root symbols
+FUTURES_ROOTS = frozenset(['NQ', 'ES', 'CL', 'GC', 'ZB', 'RTY', 'YM', 'SI', 'HG'])
+
+# One anchored automaton for both checks: a known root followed by anything
+# (NQZ5), or the general letters + month code + year digit form of 4+ chars
+# (ESH25, CLM24)
+_FUT_RE = re.compile(
+    '(?:' + '|'.join(sorted(FUTURES_ROOTS)) + r').'
+    + r'|.{2,}[A-Z]\d\Z',
+    re.DOTALL,
+)
+
+
+# Roots with known exchange/multiplier metadata (config.FUTURES_META)
+_META_ROOTS = frozenset(FUTURES_META)
+
+
+def is_futures_root(symbol: str) -> bool:
+    """Check if symbol is a bare futures root we have metadata for (NQ, ES)."""
+    return bool(symbol) and symbol.upper() in _META_ROOTS
 
 
-def is_futures_symbol(symbol: str) -> bool:
+def is_futures_symbol(symbol: str, _match=_FUT_RE.match) -> bool:
     """
     Check if symbol appears to be a futures contract.
     
@@ -78,31 +115,13 @@ def is_futures_symbol(symbol: str) -> bool:
         True
         >>> is_futures_symbol("AAPL")
         False
+    
+    _match is bound at definition time; callers never pass it.
     """
     if not symbol:
         return False
     
-    symbol_upper = symbol.upper()
-    
-    # Common futures root symbols
-    futures_roots = ['NQ', 'ES', 'CL', 'GC', 'ZB', 'RTY', 'YM', 'SI', 'HG']
-    
-    for root in futures_roots:
-        if symbol_upper.startswith(root):
-            # Check if followed by month code + year
-            if len(symbol_upper) > len(root):
-                return True
-    
-    # General pattern: letters + month code + year digit(s)
-    # Example: NQZ5, ESH25, CLM24
-    if len(symbol_upper) >= 4:
-        # Last char should be digit (year)
-        if symbol_upper[-1].isdigit():
-            # Second to last should be letter (month code)
-            if symbol_upper[-2].isalpha():
-                return True
-    
-    return False
+    return _match(symbol.upper()) is not None
 
 
 def get_contract_type(contract) -> str:
@@ -115,14 +134,16 @@ def get_contract_type(contract) -> str:
     Returns:
         Security type string: 'STK', 'FUT', 'OPT', 'FOP', 'CASH', etc.
     """
-    if not contract:
+    if contract is None:
         return 'UNKNOWN'
     
-    sec_type = getattr(contract, 'secType', None)
-    if sec_type:
-        return str(sec_type)
+    # ib_insync Contracts always carry secType; only foreign objects miss it
+    try:
+        sec_type = contract.secType
+    except AttributeError:
+        return 'UNKNOWN'
     
-    return 'UNKNOWN'
+    return sys.intern(str(sec_type)) if sec_type else 'UNKNOWN'
 
 
 def format_contract_symbol(contract) -> str:
@@ -136,17 +157,17 @@ def format_contract_symbol(contract) -> str:
     Returns:
         Formatted symbol string
     """
-    if not contract:
+    if contract is None:
         return "?"
     
-    sec_type = get_contract_type(contract)
-    
-    if sec_type == 'FUT':
-        # Use localSymbol for futures (e.g., NQZ5)
-        return getattr(contract, 'localSymbol', None) or getattr(contract, 'symbol', '?')
-    else:
+    try:
+        if get_contract_type(contract) is _FUT:
+            # Use localSymbol for futures (e.g., NQZ5)
+            return contract.localSymbol or contract.symbol or '?'
         # Use symbol for stocks
-        return getattr(contract, 'symbol', None) or getattr(contract, 'localSymbol', '?')
+        return contract.symbol or contract.localSymbol or '?'
+    except AttributeError:
+        return getattr(contract, 'symbol', None) or getattr(contract, 'localSymbol', None) or '?'
 
 
 def get_contract_multiplier(contract) -> float:
@@ -159,10 +180,13 @@ def get_contract_multiplier(contract) -> float:
     Returns:
         Multiplier as float (1.0 for stocks, varies for futures/options)
     """
-    if not contract:
+    if contract is None:
         return 1.0
     
-    multiplier = getattr(contract, 'multiplier', None)
+    try:
+        multiplier = contract.multiplier
+    except AttributeError:
+        multiplier = None
     
     if multiplier:
         try:
@@ -173,45 +197,263 @@ def get_contract_multiplier(contract) -> float:
     # Default multipliers by type
     sec_type = get_contract_type(contract)
     
-    if sec_type == 'STK':
+    if sec_type is _STK:
         return 1.0
-    elif sec_type == 'FUT':
+    elif sec_type is _FUT:
         # Try to infer from symbol
-        symbol = getattr(contract, 'symbol', '')
-        from config import FUTURES_MULTIPLIERS
-        return FUTURES_MULTIPLIERS.get(symbol, 1.0)
-    elif sec_type == 'OPT':
+        return _FUTURES_MULT.get(getattr(contract, 'symbol', ''), 1.0)
+    elif sec_type is _OPT:
         return 100.0  # Standard option contract
     
     return 1.0
 
 
-def build_and_qualify(ib, symbol: str):
+def fix_futures_exchange(contract):
     """
-    Build and qualify a stock contract.
-    Used by scanners to create contracts from symbols.
+    v15D FIX: Add exchange to futures contracts if missing.
+    IB positions() sometimes return futures without an exchange, but
+    market data and historical requests require it.
+    
+    Args:
+        contract: IB contract object
+        
+    Returns:
+        A Future with the exchange filled in, or the contract unchanged
+    """
+    if get_contract_type(contract) is not _FUT or getattr(contract, 'exchange', None):
+        return contract  # Not a future, or already has exchange
+    
+    symbol = getattr(contract, 'symbol', '')
+    correct_exchange = FUTURES_EXCHANGES.get(symbol)
+    
+    if not correct_exchange:
+        logger.warning(f"No exchange mapping for futures {symbol}")
+        return contract
+    
+    from ib_insync import Future
+    
+    fixed_contract = Future(
+        symbol=symbol,
+        exchange=correct_exchange,
+        currency=getattr(contract, 'currency', 'USD'),
+        lastTradeDateOrContractMonth=getattr(contract, 'lastTradeDateOrContractMonth', ''),
+        multiplier=getattr(contract, 'multiplier', ''),
+        localSymbol=getattr(contract, 'localSymbol', ''),
+    )
+    
+    # Preserve conId if available
+    if hasattr(contract, 'conId'):
+        fixed_contract.conId = contract.conId
+    
+    logger.info(f"[FIX] Added exchange={correct_exchange} to {symbol} contract")
+    return fixed_contract
+
+
+# Qualified contracts by (symbol, secType). conId/exchange don't change
+# intraday, so repeat scanner hits skip the IB round-trip.
+QUALIFY_CACHE_TTL = 3600.0
+_QUAL_CACHE = {}  # (symbol, secType) -> (monotonic ts, qualified contract)
+
+
+def clear_contract_cache():
+    """Drop all cached qualified contracts (call after an IB reconnect)."""
+    _QUAL_CACHE.clear()
+
+
+def build_and_qualify_many(ib, symbols, skip_nontradable: bool = False) -> dict:
+    """
+    Build and qualify stock contracts for many symbols at once.
+    Uncached symbols are qualified in a single qualifyContracts call,
+    which pipelines the requests over one IB socket.
     
     Args:
         ib: IB connection instance
-        symbol: Stock symbol
+        symbols: Stock symbols
+        skip_nontradable: Leave out symbols matching looks_nontradable_symbol
         
     Returns:
-        Qualified contract or None if failed
+        {symbol: qualified contract, unqualified contract, or None if failed}
     """
+    out = {}
+    pending = []
+    now = time.monotonic()
+    
+    for symbol in symbols:
+        if symbol in out or (skip_nontradable and looks_nontradable_symbol(symbol)):
+            continue
+        hit = _QUAL_CACHE.get((symbol, 'STK'))
+        if hit and now - hit[0] < QUALIFY_CACHE_TTL:
+            out[symbol] = hit[1]
+        else:
+            out[symbol] = None
+            pending.append(symbol)
+    
+    if not pending:
+        return out
+    
     try:
         from ib_insync import Stock
         
-        contract = Stock(symbol, 'SMART', 'USD')
+        contracts = [Stock(symbol, 'SMART', 'USD') for symbol in pending]
         
-        # Qualify the contract
-        qualified = ib.qualifyContracts(contract)
+        # Qualifies in place; qualified contracts come back with a conId
+        ib.qualifyContracts(*contracts)
         
-        if qualified and len(qualified) > 0:
-            return qualified[0]
+        now = time.monotonic()
+        for symbol, contract in zip(pending, contracts):
+            if getattr(contract, 'conId', 0):
+                _QUAL_CACHE[(symbol, 'STK')] = (now, contract)
+            # Fallback to unqualified (not cached, so it is retried next time)
+            out[symbol] = contract
         
-        # Fallback to unqualified
-        return contract
+    except Exception as e:
+        logger.warning(f"Failed to build contracts for {len(pending)} symbols: {e}")
+    
+    return out
+
+
+# Primary exchanges we never trade on
+_OTC_EXCHANGES = frozenset(['PINK', 'OTC', 'OTCBB'])
+
+
+def qualify_universe(ib, symbols: Iterable[str]) -> Iterator:
+    """
+    Qualify a scan universe in one pass.
+    Drops non-tradable symbols, qualifies stocks in one batch (through the
+    contract cache) and resolves futures roots to their front month, and
+    yields only qualified, non-OTC contracts.
+    
+    Args:
+        ib: IB connection instance
+        symbols: Stock symbols and/or futures roots
+        
+    Yields:
+        Qualified contracts
+    """
+    stocks = []
+    roots = []
+    for s in symbols:
+        if not s or looks_nontradable_symbol(s):
+            continue
+        s = s.upper()
+        (roots if s in _META_ROOTS else stocks).append(s)
+    
+    if stocks:
+        qualified = build_and_qualify_many(ib, stocks)
+        for s in stocks:
+            c = qualified.get(s)
+            if c is None or not getattr(c, 'conId', 0):
+                continue
+            if getattr(c, 'primaryExchange', '') in _OTC_EXCHANGES:
+                continue
+            yield c
+    
+    if roots:
+        # A bare root matches every listed month (ambiguous to qualifyContracts),
+        # so resolve each to its front month instead
+        for c in qualify_nearest_futures(ib, roots).values():
+            if c is not None:
+                yield c
+
+
+# Nearest futures contract per root; shorter TTL than stocks since it rolls
+NEAREST_FUTURE_TTL = 900.0
+
+
+async def qualify_nearest_futures_async(ib, roots) -> dict:
+    """
+    Resolve the front-month contract for several futures roots.
+    All reqContractDetails requests are in flight together on the IB
+    socket, so N roots cost about one round-trip.
+    
+    Args:
+        ib: IB connection instance
+        roots: Futures roots (NQ, ES, ...)
         
+    Returns:
+        {root: nearest unexpired contract, or None if not found}
+    """
+    from ib_insync import Future
+    
+    roots = list(roots)
+    results = await asyncio.gather(
+        *(ib.reqContractDetailsAsync(Future(r, exchange=futures_meta(r)[0], currency='USD'))
+          for r in roots),
+        return_exceptions=True,
+    )
+    
+    today = datetime.now().strftime('%Y%m%d')
+    
+    def expiry(c):
+        # Month-only expiries (YYYYMM) sort as the end of that month
+        return (c.lastTradeDateOrContractMonth + '99')[:8]
+    
+    out = {}
+    for root, details in zip(roots, results):
+        if isinstance(details, Exception):
+            logger.warning(f"Contract details failed for {root}: {details}")
+            details = None
+        if not details:
+            out[root] = None
+            continue
+        contracts = [d.contract for d in details]
+        live = [c for c in contracts if expiry(c) >= today] or contracts
+        out[root] = min(live, key=expiry)
+    return out
+
+
+def qualify_nearest_futures(ib, roots) -> dict:
+    """
+    Sync wrapper for qualify_nearest_futures_async with a per-root cache.
+    Only roots without a fresh cache entry (NEAREST_FUTURE_TTL) hit IB.
+    
+    Args:
+        ib: IB connection instance
+        roots: Futures roots (NQ, ES, ...)
+        
+    Returns:
+        {root: nearest contract, or None if not found}
+    """
+    out = {}
+    pending = []
+    now = time.monotonic()
+    
+    for root in roots:
+        hit = _QUAL_CACHE.get((root, 'FUT'))
+        if hit and now - hit[0] < NEAREST_FUTURE_TTL:
+            out[root] = hit[1]
+        else:
+            pending.append(root)
+    
+    if not pending:
+        return out
+    
+    try:
+        fetched = ib.run(qualify_nearest_futures_async(ib, pending))
     except Exception as e:
-        logger.warning(f"Failed to build contract for {symbol}: {e}")
-        return None
+        logger.warning(f"Failed to qualify futures {', '.join(pending)}: {e}")
+        fetched = {}
+    
+    now = time.monotonic()
+    for root in pending:
+        contract = fetched.get(root)
+        if contract is not None:
+            _QUAL_CACHE[(root, 'FUT')] = (now, contract)
+        out[root] = contract
+    return out
+
+
+def build_and_qualify(ib, symbol: str):
+    """
+    Build and qualify a stock contract.
+    Used by scanners to create contracts from symbols.
+    Qualified results are cached for QUALIFY_CACHE_TTL seconds.
+    
+    Args:
+        ib: IB connection instance
+        symbol: Stock symbol
+        
+    Returns:
+        Qualified contract or None if failed
+    """
+    return build_and_qualify_many(ib, [symbol]).get(symbol)
@@ -9,18 +9,40 @@ Professional 4-section dashboard:
 White theme, 2-second refresh, extended hours support
 """
 
+import json
 import logging
-from flask import Flask, jsonify, render_template_string
+from flask import Flask, Response
 from datetime import datetime
 
+try:
+    import orjson
+    _ORJSON_AVAILABLE = True
+except Exception:
+    _ORJSON_AVAILABLE = False
+
+try:
+    from waitress import serve as _waitress_serve
+    _WAITRESS_AVAILABLE = True
+except Exception:
+    _WAITRESS_AVAILABLE = False
+
 from config import *
-from state_bus import STATE
+from state_bus import EMPTY_QUOTE, STATE
 
 logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
 
 
+def _json(obj) -> Response:
+    """Serialize obj to a JSON response (orjson when installed)."""
+    if _ORJSON_AVAILABLE:
+        body = orjson.dumps(obj, default=str, option=orjson.OPT_SERIALIZE_NUMPY)
+    else:
+        body = json.dumps(obj, default=str)
+    return Response(body, mimetype='application/json')
+
+
 def format_currency(value):
     """Format number as currency."""
     if value is None:
@@ -38,7 +60,9 @@ def format_percent(value):
 @app.route('/')
 def index():
     """Serve main dashboard page."""
-    return render_template_string(DASHBOARD_HTML)
+    # DASHBOARD_HTML is trusted static markup with no placeholders - skip
+    # the Jinja parse/autoescape pass and serve the pre-encoded bytes
+    return Response(_DASHBOARD_BYTES, mimetype='text/html')
 
 
 @app.route('/api/status')
@@ -46,7 +70,7 @@ def api_status():
     """System status endpoint."""
     market_phase = getattr(STATE, 'market_phase', 'unknown')
     
-    return jsonify({
+    return _json({
         'uptime': STATE.uptime_seconds(),
         'ib_connected': STATE.ib_connected,
         'market_phase': market_phase,
@@ -59,79 +83,30 @@ def api_status():
 
 @app.route('/api/positions')
 def api_positions():
-    """Positions with live P&L."""
-    positions_list = []
-    
-    for symbol, pos in STATE.positions.items():
-        try:
-            # Get latest price
-            price_data = STATE.prices.get(symbol, {})
-            last = price_data.get('last')
-            age = price_data.get('age', 999)
-            
-            # Get position details
-            qty = pos.get('qty', 0)
-            avg_cost = pos.get('avg', 0)
-            sec_type = pos.get('sec_type', 'STK')
-            multiplier = pos.get('multiplier', 1)
-            
-            # Calculate P&L
-            if last and avg_cost:
-                pnl = (last - avg_cost) * qty * multiplier
-                pnl_pct = ((last / avg_cost) - 1) * 100 if avg_cost > 0 else 0
-            else:
-                pnl = 0
-                pnl_pct = 0
-            
-            positions_list.append({
-                'symbol': symbol,
-                'qty': qty,
-                'avg': avg_cost,
-                'last': last,
-                'pnl': pnl,
-                'pnl_pct': pnl_pct,
-                'sec_type': sec_type,
-                'multiplier': multiplier,
-                'age': age
-            })
-            
-        except Exception as e:
-            logger.error(f"Position API error for {symbol}: {e}")
-            continue
-    
-    # Calculate total P&L
-    total_pnl = sum(p['pnl'] for p in positions_list)
-    
-    return jsonify({
-        'positions': positions_list,
-        'total_pnl': total_pnl,
-        'count': len(positions_list)
-    })
+    """Positions with live P&L (precomputed by STATE on each price update)."""
+    return _json(STATE.get_positions_snapshot())
+
+
+# FUTURES_WATCHLIST is static: pair each root with its multiplier once
+_FUTURES = [(root, FUTURES_MULTIPLIERS.get(root, 1)) for root in FUTURES_WATCHLIST]
 
 
 @app.route('/api/futures')
 def api_futures():
     """Futures watchlist prices."""
     futures_list = []
+    prices_get = STATE.prices.get
     
-    for symbol in FUTURES_WATCHLIST:
-        try:
-            price_data = STATE.prices.get(symbol, {})
-            last = price_data.get('last')
-            age = price_data.get('age', 999)
-            
-            futures_list.append({
-                'symbol': symbol,
-                'last': last,
-                'age': age,
-                'multiplier': FUTURES_MULTIPLIERS.get(symbol, 1)
-            })
-            
-        except Exception as e:
-            logger.error(f"Futures API error for {symbol}: {e}")
-            continue
+    for symbol, multiplier in _FUTURES:
+        quote = prices_get(symbol, EMPTY_QUOTE)
+        futures_list.append({
+            'symbol': symbol,
+            'last': quote.last,
+            'age': quote.age,
+            'multiplier': multiplier
+        })
     
-    return jsonify({
+    return _json({
         'futures': futures_list,
         'count': len(futures_list)
     })
@@ -142,7 +117,7 @@ def api_options():
     """Unusual options activity."""
     options = getattr(STATE, 'unusual_options', [])
     
-    return jsonify({
+    return _json({
         'options': options,
         'count': len(options)
     })
@@ -153,7 +128,7 @@ def api_scanner():
     """Scanner results with scores."""
     scanner_results = getattr(STATE, 'scanner_results', [])
     
-    return jsonify({
+    return _json({
         'results': scanner_results,
         'count': len(scanner_results)
     })
@@ -715,10 +690,24 @@ DASHBOARD_HTML = """
 </html>
 """
 
+# Encoded once at import; index() serves the same bytes on every hit
+_DASHBOARD_BYTES = DASHBOARD_HTML.encode('utf-8')
+
 
 def run_dashboard():
-    """Start the dashboard server."""
+    """Start the dashboard server (waitress when installed, else Flask dev server)."""
     logger.info(f"Starting dashboard on {DASHBOARD_HOST}:{DASHBOARD_PORT}")
+    if _WAITRESS_AVAILABLE and not DASHBOARD_DEBUG:
+        _waitress_serve(
+            app,
+            host=DASHBOARD_HOST,
+            port=DASHBOARD_PORT,
+            threads=DASHBOARD_THREADS,
+            connection_limit=DASHBOARD_CONNECTION_LIMIT,
+            channel_timeout=DASHBOARD_KEEPALIVE_SEC,
+            _quiet=True,
+        )
+        return
     app.run(
         host=DASHBOARD_HOST,
         port=DASHBOARD_PORT,
@@ -12,18 +12,215 @@ v15C FIXES:
 - Fix age calculation for stale detection
 """
 
+import gzip
+import hashlib
+import json
 import logging
-from flask import Flask, jsonify, render_template_string
+import re
+import threading
+import time
+from flask import Flask, Response, request
 from datetime import datetime
 
+try:
+    import orjson
+    _ORJSON_AVAILABLE = True
+except Exception:
+    _ORJSON_AVAILABLE = False
+
+try:
+    import msgpack
+    _MSGPACK_AVAILABLE = True
+except Exception:
+    _MSGPACK_AVAILABLE = False
+
+try:
+    from flask_sock import Sock
+    _SOCK_AVAILABLE = True
+except Exception:
+    _SOCK_AVAILABLE = False
+
+try:
+    import brotli
+    _BROTLI_AVAILABLE = True
+except Exception:
+    _BROTLI_AVAILABLE = False
+
+try:
+    import zstandard
+    _ZSTD_AVAILABLE = True
+except Exception:
+    _ZSTD_AVAILABLE = False
+
+try:
+    from waitress import serve as _waitress_serve
+    _WAITRESS_AVAILABLE = True
+except Exception:
+    _WAITRESS_AVAILABLE = False
+
 from config import *
-from state_bus import STATE
+from state_bus import EMPTY_QUOTE, STATE
+from state_shm import SnapshotReader
 
 logger = logging.getLogger(__name__)
 
 app = Flask(__name__)
 
 
+def _dumps(obj) -> bytes:
+    """Serialize obj to JSON bytes (orjson when installed)."""
+    if _ORJSON_AVAILABLE:
+        return orjson.dumps(obj, default=str, option=orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(obj, default=str).encode('utf-8')
+
+
+def _loads(body: bytes):
+    """Parse JSON bytes (orjson when installed)."""
+    if _ORJSON_AVAILABLE:
+        return orjson.loads(body)
+    return json.loads(body)
+
+
+def _json(obj) -> Response:
+    """Serialize obj to a JSON response."""
+    return Response(_dumps(obj), mimetype='application/json')
+
+
+# STATE versions restart at 0 with the process, so version-based ETags are
+# scoped to this run
+_ETAG_EPOCH = f"{int(STATE.started_at):x}"
+
+# Always revalidate via ETag; body encoding depends on Accept-Encoding
+_JSON_HEADERS = {'Cache-Control': 'no-cache', 'Vary': 'Accept-Encoding'}
+
+# Bodies smaller than this aren't worth compressing
+_COMPRESS_MIN_SIZE = 500
+
+# Compressed JSON bodies, shared by every client asking for the same
+# representation: {(etag, encoding): bytes}
+_COMPRESSED = {}
+_COMPRESSED_MAX = 256
+
+
+def _accepted_encoding() -> str:
+    """Best body encoding the client accepts ('zstd', 'br', 'gzip' or '')."""
+    accept = request.headers.get('Accept-Encoding', '')
+    if _ZSTD_AVAILABLE and 'zstd' in accept:
+        return 'zstd'
+    if _BROTLI_AVAILABLE and 'br' in accept:
+        return 'br'
+    if 'gzip' in accept:
+        return 'gzip'
+    return ''
+
+
+# ZstdCompressor instances must not be shared between threads
+_zstd_local = threading.local()
+
+
+def _compress(body: bytes, encoding: str) -> bytes:
+    """Compress body with the given Content-Encoding."""
+    if encoding == 'zstd':
+        cctx = getattr(_zstd_local, 'cctx', None)
+        if cctx is None:
+            # Level 1: fast enough to run on every snapshot change
+            cctx = _zstd_local.cctx = zstandard.ZstdCompressor(level=1)
+        return cctx.compress(body)
+    if encoding == 'br':
+        return brotli.compress(body, quality=5)
+    return gzip.compress(body, compresslevel=6)
+
+
+def _etag_json(etag: str, body=None, build=None, mimetype: str = 'application/json') -> Response:
+    """JSON response with a weak ETag, or 304 when the client already has it.
+
+    Pass the serialized body, or build() to produce it only on a miss.
+    Bodies are compressed once per ETag and encoding.
+    """
+    if request.if_none_match.contains_weak(etag):
+        resp = Response(status=304, headers=_JSON_HEADERS)
+    else:
+        if body is None:
+            body = build()
+        encoding = _accepted_encoding() if len(body) >= _COMPRESS_MIN_SIZE else ''
+        if encoding:
+            key = (etag, encoding)
+            packed = _COMPRESSED.get(key)
+            if packed is None:
+                if len(_COMPRESSED) >= _COMPRESSED_MAX:
+                    _COMPRESSED.clear()
+                packed = _COMPRESSED[key] = _compress(body, encoding)
+            resp = Response(packed, mimetype=mimetype, headers=_JSON_HEADERS)
+            resp.headers['Content-Encoding'] = encoding
+        else:
+            resp = Response(body, mimetype=mimetype, headers=_JSON_HEADERS)
+    resp.set_etag(etag, weak=True)
+    return resp
+
+
+# Serialized bodies for endpoints backed by a single STATE field:
+# {endpoint: (field version, body bytes)}
+_BODY_CACHE = {}
+
+
+def _field_body(key: str, v: int, build) -> bytes:
+    """Serialized build() for field version v, encoded once per version."""
+    hit = _BODY_CACHE.get(key)
+    if hit is None or hit[0] != v:
+        # v is read before build(), so a racing update can only make the
+        # cached body newer than its version, never older
+        hit = (v, _dumps(build()))
+        _BODY_CACHE[key] = hit
+    return hit[1]
+
+
+def _versioned_json(key: str, field: str, build) -> Response:
+    """Serve build() as JSON, re-serializing only when STATE.<field> changes."""
+    v = STATE.version(field)
+    return _etag_json(f"{key}-{_ETAG_EPOCH}-{v}", build=lambda: _field_body(key, v, build))
+
+
+# Payloads and their serialized bodies, shared by concurrent clients for up
+# to _RESPONSE_TTL seconds and dropped early when STATE changes:
+# {key: (expires, version, body, etag, payload)}. Cached payloads are
+# shared, so treat them as read-only.
+_RESPONSE_TTL = 0.5
+_TTL_CACHE = {}
+_TTL_LOCK = threading.Lock()  # one rebuild per miss; other clients wait for it
+
+
+def _cached_entry(key: str, build, dumps=_dumps) -> tuple:
+    """Cache entry for build(), reused while fresh and STATE is unchanged."""
+    now = time.monotonic()
+    v = STATE.version()
+    hit = _TTL_CACHE.get(key)
+    if hit is not None and hit[0] > now and hit[1] == v:
+        return hit
+    with _TTL_LOCK:
+        hit = _TTL_CACHE.get(key)
+        if hit is not None and hit[0] > now and hit[1] == v:
+            return hit
+        payload = build()
+        body = dumps(payload)
+        # Content hash: these payloads carry ages/uptime that move without
+        # a STATE version bump
+        hit = (now + _RESPONSE_TTL, v, body, hashlib.blake2b(body, digest_size=8).hexdigest(), payload)
+        _TTL_CACHE[key] = hit
+    return hit
+
+
+def _cached(key: str, build, dumps=_dumps) -> tuple:
+    """(body, etag) for build(), reused while fresh and STATE is unchanged."""
+    hit = _cached_entry(key, build, dumps)
+    return hit[2], hit[3]
+
+
+def _cached_json(key: str, build, dumps=_dumps) -> Response:
+    """JSON response from _cached(), 304 when the body is unchanged."""
+    body, etag = _cached(key, build, dumps)
+    return _etag_json(etag, body)
+
+
 def format_currency(value):
     """Format number as currency."""
     if value is None:
@@ -40,82 +237,78 @@ def format_percent(value):
 
 @app.route('/')
 def index():
-    """Serve main dashboard page."""
-    return render_template_string(DASHBOARD_HTML)
+    """Serve main dashboard page (static shell, pre-encoded at import)."""
+    encoding = _accepted_encoding()
+    body, etag = _DASHBOARD_VARIANTS[encoding]
+    headers = {
+        'Cache-Control': 'public, max-age=3600',
+        'Vary': 'Accept-Encoding',
+        'ETag': f'"{etag}"',
+    }
+    if request.if_none_match.contains(etag):
+        return Response(status=304, headers=headers)
+    if encoding:
+        headers['Content-Encoding'] = encoding
+    return Response(body, mimetype='text/html', headers=headers)
 
 
-@app.route('/api/status')
-def api_status():
-    """System status endpoint."""
-    market_phase = getattr(STATE, 'market_phase', 'unknown')
+_ts_cache = [0.0, '']  # [time.time() when built, isoformat string]
+
+
+def _now_iso() -> str:
+    """datetime.now().isoformat(), rebuilt at most every 0.5s."""
+    now = time.time()
+    if now - _ts_cache[0] > 0.5:
+        _ts_cache[:] = [now, datetime.fromtimestamp(now).isoformat()]
+    return _ts_cache[1]
+
+
+def _status_payload() -> dict:
+    """System status fields."""
+    ctx = STATE.status_ctx()
     
-    return jsonify({
+    return {
         'uptime': STATE.uptime_seconds(),
-        'ib_connected': STATE.ib_connected,
-        'market_phase': market_phase,
-        'subscriptions': len(STATE.symbols_subscribed),
+        'ib_connected': ctx['ib_connected'],
+        'market_phase': ctx['market_phase'],
+        'subscriptions': ctx['subscriptions'],
         'max_subscriptions': IB_MAX_SUBSCRIPTIONS,
-        'positions': len(STATE.positions),
-        'timestamp': datetime.now().isoformat()
-    })
+        'positions': ctx['positions'],
+        'timestamp': _now_iso()
+    }
+
+
+@app.route('/api/status')
+def api_status():
+    """System status endpoint."""
+    return _cached_json('status', _status_payload)
+
+
+@app.route('/api/heartbeat')
+def api_heartbeat():
+    """Main-loop heartbeat (seq, uptime, tick/sync ages, loop lag)."""
+    if _SHARED_HB is not None:
+        seq, body = _SHARED_HB.read()
+        return _etag_json(f"heartbeat-{_ETAG_EPOCH}-shm{seq}", body)
+    return _versioned_json('heartbeat', 'heartbeat', STATE.get_heartbeat)
+
+
+def _positions_payload() -> dict:
+    """Positions with live P&L, precomputed by STATE on each price update."""
+    return STATE.get_positions_snapshot()
 
 
 @app.route('/api/positions')
 def api_positions():
     """Positions with live P&L - includes ALL positions (stocks + futures)."""
-    positions_list = []
-    
-    for symbol, pos in STATE.positions.items():
-        try:
-            # For futures (CLZ5, NQZ5), the symbol IS the key
-            # For stocks (TSLA, TOGI), same
-            price_data = STATE.prices.get(symbol, {})
-            
-            last = price_data.get('last')
-            age = price_data.get('age', 999)
-            
-            # Get position details
-            qty = pos.get('qty', 0)
-            avg_cost = pos.get('avg', 0)
-            sec_type = pos.get('sec_type', 'STK')
-            multiplier = pos.get('multiplier', 1)
-            
-            # Calculate P&L
-            if last and avg_cost:
-                pnl = (last - avg_cost) * qty * multiplier
-                pnl_pct = ((last / avg_cost) - 1) * 100 if avg_cost > 0 else 0
-            else:
-                pnl = 0
-                pnl_pct = 0
-            
-            positions_list.append({
-                'symbol': symbol,
-                'qty': qty,
-                'avg': avg_cost,
-                'last': last,
-                'pnl': pnl,
-                'pnl_pct': pnl_pct,
-                'sec_type': sec_type,
-                'multiplier': multiplier,
-                'age': age
-            })
-            
-        except Exception as e:
-            logger.error(f"Position API error for {symbol}: {e}")
-            continue
-    
-    # Calculate total P&L
-    total_pnl = sum(p['pnl'] for p in positions_list)
-    
-    return jsonify({
-        'positions': positions_list,
-        'total_pnl': total_pnl,
-        'count': len(positions_list)
-    })
+    return _cached_json('positions', _positions_payload)
 
 
-@app.route('/api/futures')
-def api_futures():
+# FUTURES_WATCHLIST is static: pair each root with its multiplier once
+_FUTURES = [(root, FUTURES_MULTIPLIERS.get(root, 1)) for root in FUTURES_WATCHLIST]
+
+
+def _futures_payload() -> dict:
     """
     Futures watchlist prices.
     
@@ -123,60 +316,335 @@ def api_futures():
     Futures may be subscribed as NQZ5, ESZ5, etc. but we want to display as NQ, ES.
     """
     futures_list = []
+    append = futures_list.append
+    prices_get = STATE.prices.get
+    contract_for = STATE.futures_root_to_contract.get
     
-    for root_symbol in FUTURES_WATCHLIST:
-        try:
-            # Try root symbol first (NQ, ES, etc.)
-            price_data = STATE.prices.get(root_symbol, {})
-            
-            # If not found, try to find any subscribed symbol starting with root
-            if not price_data or price_data.get('last') is None:
-                for subscribed_symbol in STATE.symbols_subscribed:
-                    if subscribed_symbol.startswith(root_symbol):
-                        price_data = STATE.prices.get(subscribed_symbol, {})
-                        if price_data.get('last') is not None:
-                            break
-            
-            last = price_data.get('last')
-            age = price_data.get('age', 999)
-            
-            futures_list.append({
-                'symbol': root_symbol,
-                'last': last,
-                'age': age,
-                'multiplier': FUTURES_MULTIPLIERS.get(root_symbol, 1)
-            })
-            
-        except Exception as e:
-            logger.error(f"Futures API error for {root_symbol}: {e}")
-            continue
+    # Plain lookups with EMPTY_QUOTE defaults - nothing here can raise
+    for root_symbol, multiplier in _FUTURES:
+        # Try root symbol first (NQ, ES, etc.)
+        quote = prices_get(root_symbol, EMPTY_QUOTE)
+        
+        # If not found, use the dated contract subscribed for this root (NQZ5)
+        if quote.last is None:
+            contract = contract_for(root_symbol)
+            if contract:
+                quote = prices_get(contract, EMPTY_QUOTE)
+        
+        append({
+            'symbol': root_symbol,
+            'last': quote.last,
+            'age': quote.age,
+            'multiplier': multiplier
+        })
     
-    return jsonify({
+    return {
         'futures': futures_list,
         'count': len(futures_list)
-    })
+    }
 
 
-@app.route('/api/options')
-def api_options():
+@app.route('/api/futures')
+def api_futures():
+    """Futures watchlist prices."""
+    return _cached_json('futures', _futures_payload)
+
+
+def _options_payload() -> dict:
     """Unusual options activity."""
     options = getattr(STATE, 'unusual_options', [])
-    
-    return jsonify({
+    return {
         'options': options,
         'count': len(options)
-    })
+    }
 
 
-@app.route('/api/scanner')
-def api_scanner():
+@app.route('/api/options')
+def api_options():
+    """Unusual options activity."""
+    return _versioned_json('options', 'unusual_options', _options_payload)
+
+
+def _scanner_payload() -> dict:
     """Scanner results with scores."""
     scanner_results = getattr(STATE, 'scanner_results', [])
-    
-    return jsonify({
+    return {
         'results': scanner_results,
         'count': len(scanner_results)
-    })
+    }
+
+
+@app.route('/api/scanner')
+def api_scanner():
+    """Scanner results with scores."""
+    return _versioned_json('scanner', 'scanner_results', _scanner_payload)
+
+
+# Push channels (WebSocket /ws, SSE /api/stream): one open connection per
+# browser instead of five polls every 2s. Both block on STATE changes and
+# re-check at least every _STREAM_REFRESH_SEC (uptime/ages move without a
+# version bump); only payloads that actually changed are written.
+_STREAM_REFRESH_SEC = 2.0
+
+
+# Process mode (run_dashboard_process): this process's STATE is idle and the
+# snapshot comes from the trading process through shared memory instead
+_SHARED = None
+_SHARED_POLL_SEC = 0.1
+_shared_last = (None, b'', '', None)  # (seq, body, etag, payload)
+_SHARED_HB = None  # heartbeat block; the heartbeat is not part of the snapshot
+
+
+def _shared_snapshot() -> tuple:
+    """(seq, body, etag, payload) of the published snapshot, decoded once per publish."""
+    global _shared_last
+    hit = _shared_last
+    if _SHARED.seq() != hit[0]:
+        seq, body = _SHARED.read()
+        payload = _loads(body)
+        hit = _shared_last = (seq, body, hashlib.blake2b(body, digest_size=8).hexdigest(), payload)
+    return hit
+
+
+def _dashboard_payload() -> dict:
+    """All dashboard sections in one message."""
+    if _SHARED is not None:
+        return _shared_snapshot()[3]
+    return {
+        'status': _status_payload(),
+        'positions': _positions_payload(),
+        'futures': _futures_payload(),
+        'scanner': _scanner_payload(),
+        'options': _options_payload(),
+    }
+
+
+# Sections that only change when a scan completes: {section: (STATE field, builder)}
+_SCAN_SECTIONS = {
+    'scanner': ('scanner_results', _scanner_payload),
+    'options': ('unusual_options', _options_payload),
+}
+
+
+def _dumps_dashboard(payload: dict) -> bytes:
+    """Serialize _dashboard_payload(), splicing in the scanner/options bodies
+    cached per scan (shared with /api/scanner and /api/options)."""
+    parts = []
+    for name, data in payload.items():
+        scan = _SCAN_SECTIONS.get(name)
+        if scan:
+            field, build = scan
+            body = _field_body(name, STATE.version(field), build)
+        else:
+            body = _dumps(data)
+        parts.append(b'"%s":%s' % (name.encode(), body))
+    return b'{' + b','.join(parts) + b'}'
+
+
+# List field of each table section: {section: list key}
+_TABLE_KEYS = {'positions': 'positions', 'futures': 'futures', 'scanner': 'results', 'options': 'options'}
+
+
+def _to_columns(rows: list) -> dict:
+    """Rows (list of dicts) as {field: [value per row]}; missing fields are None."""
+    fields = dict.fromkeys(k for row in rows for k in row)
+    return {f: [row.get(f) for row in rows] for f in fields}
+
+
+def _columnar_payload() -> dict:
+    """_dashboard_payload() with every table as columns instead of rows."""
+    # Shallow copy: in process mode _dashboard_payload() is the cached decode
+    # of the shared snapshot, which the section routes and streams also read
+    payload = dict(_dashboard_payload())
+    for name, key in _TABLE_KEYS.items():
+        payload[name] = {**payload[name], key: _to_columns(payload[name][key])}
+    return payload
+
+
+# The snapshot is assembled by one producer thread, not by request threads:
+# (body, etag, payload) is replaced whole, so readers take it without a lock
+_snapshot = None
+_snapshot_cond = threading.Condition()
+_snapshot_thread = None
+# How long a request waits for the first snapshot before giving up (503)
+_SNAPSHOT_WAIT_SEC = _STREAM_REFRESH_SEC * 3
+
+
+def _build_snapshots():
+    """Producer: rebuild the snapshot when STATE changes (re-checked every
+    _STREAM_REFRESH_SEC), at most once per _RESPONSE_TTL."""
+    global _snapshot
+    v = None
+    while True:
+        v = STATE.wait_version(v, timeout=_STREAM_REFRESH_SEC)
+        try:
+            payload = _dashboard_payload()
+            body = _dumps_dashboard(payload)
+        except Exception:
+            logger.exception("Dashboard snapshot build failed")
+        else:
+            if _snapshot is None or body != _snapshot[0]:
+                with _snapshot_cond:
+                    _snapshot = (body, hashlib.blake2b(body, digest_size=8).hexdigest(), payload)
+                    _snapshot_cond.notify_all()
+        time.sleep(_RESPONSE_TTL)
+
+
+def _latest_snapshot():
+    """Latest (body, etag, payload); starts the producer on first use.
+
+    None if no snapshot has been built within _SNAPSHOT_WAIT_SEC (the
+    producer keeps failing), so callers never block indefinitely.
+    """
+    global _snapshot_thread
+    snap = _snapshot
+    if snap is None:
+        with _snapshot_cond:
+            if _snapshot_thread is None:
+                _snapshot_thread = threading.Thread(target=_build_snapshots, daemon=True, name="SnapshotBuilder")
+                _snapshot_thread.start()
+            _snapshot_cond.wait_for(lambda: _snapshot is not None, _SNAPSHOT_WAIT_SEC)
+            snap = _snapshot
+    return snap
+
+
+@app.route('/api/snapshot')
+def api_snapshot():
+    """All dashboard sections in one response (the per-section routes remain).
+
+    ?layout=columns returns each table column-oriented ({field: [...]}),
+    which names every field once instead of once per row.
+    """
+    if request.args.get('layout') == 'columns':
+        return _cached_json('snapshot.columns', _columnar_payload)
+    if _SHARED is not None:
+        hit = _shared_snapshot()
+        return _etag_json(hit[2], hit[1])
+    snap = _latest_snapshot()
+    if snap is None:
+        resp = Response(status=503, headers=_JSON_HEADERS)
+        resp.headers['Retry-After'] = str(int(_STREAM_REFRESH_SEC))
+        return resp
+    return _etag_json(snap[1], snap[0])
+
+
+if _MSGPACK_AVAILABLE:
+    def _packb(obj) -> bytes:
+        """Serialize obj to msgpack bytes."""
+        return msgpack.packb(obj, use_bin_type=True, default=str)
+    
+    @app.route('/api/snapshot.msgpack')
+    def api_snapshot_msgpack():
+        """/api/snapshot as msgpack, for API clients that decode it."""
+        hit = _cached_entry('snapshot.msgpack', _dashboard_payload, _packb)
+        return _etag_json(hit[3], hit[2], mimetype='application/msgpack')
+
+
+def _iter_dashboard_updates():
+    """Yield (body, payload) for the dashboard snapshot as it changes."""
+    if _SHARED is not None:
+        seq = None
+        while True:
+            hit = _shared_snapshot()
+            if hit[0] != seq:
+                seq = hit[0]
+                yield hit[1], hit[3]
+            time.sleep(_SHARED_POLL_SEC)
+    snap = _latest_snapshot()
+    while snap is None:  # long-lived consumers keep waiting for the first build
+        snap = _latest_snapshot()
+    while True:
+        yield snap[0], snap[2]
+        with _snapshot_cond:
+            _snapshot_cond.wait_for(lambda: _snapshot is not snap)
+            snap = _snapshot
+
+
+# Sections whose rows can be patched individually: {section: list key}
+_ROW_SECTIONS = {'positions': 'positions', 'futures': 'futures'}
+
+
+def _dashboard_delta(prev: dict, cur: dict) -> list:
+    """Changes from prev to cur, as push-channel delta entries.
+
+    A row section whose symbols are unchanged sends only the rows that
+    differ, as [index, row] pairs, plus its other fields (totals, count).
+    Any other changed section is sent whole.
+    """
+    changes = []
+    for name, data in cur.items():
+        old = prev.get(name)
+        if old == data:
+            continue
+        key = _ROW_SECTIONS.get(name)
+        if key and old is not None and \
+                [r['symbol'] for r in old[key]] == [r['symbol'] for r in data[key]]:
+            changes.append({
+                'type': 'rows',
+                'section': name,
+                'rows': [[i, row] for i, (was, row) in enumerate(zip(old[key], data[key])) if was != row],
+                'meta': {k: v for k, v in data.items() if k != key},
+            })
+        else:
+            changes.append({'type': 'section', 'section': name, 'data': data})
+    return changes
+
+
+def _iter_dashboard_messages():
+    """Yield push messages: the full dashboard once, then only what changed."""
+    prev = None
+    for body, payload in _iter_dashboard_updates():
+        if prev is None:
+            yield b'{"type":"full","data":' + body + b'}'
+        else:
+            yield _dumps({'type': 'delta', 'changes': _dashboard_delta(prev, payload)})
+        prev = payload
+
+
+# Each push client holds a server worker for as long as it is connected;
+# past DASHBOARD_MAX_STREAMS they are turned away and the page polls instead
+_STREAM_SLOTS = threading.BoundedSemaphore(DASHBOARD_MAX_STREAMS)
+
+
+@app.route('/api/stream')
+def api_stream():
+    """Push dashboard updates as Server-Sent Events (503 when all stream slots are taken)."""
+    if not _STREAM_SLOTS.acquire(blocking=False):
+        resp = Response(status=503, headers=_JSON_HEADERS)
+        resp.headers['Retry-After'] = str(int(_STREAM_REFRESH_SEC))
+        return resp
+    
+    def gen():
+        for msg in _iter_dashboard_messages():
+            yield b'data: ' + msg + b'\n\n'
+    
+    resp = Response(gen(), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+    # Runs when the server closes the response, even if gen() never started
+    resp.call_on_close(_STREAM_SLOTS.release)
+    return resp
+
+
+# run_dashboard() serves with waitress when it can; flask-sock needs the
+# Werkzeug server's raw socket, so /ws only exists without waitress
+_USE_WAITRESS = _WAITRESS_AVAILABLE and not DASHBOARD_DEBUG
+_WS_ENABLED = _SOCK_AVAILABLE and not _USE_WAITRESS
+
+if _WS_ENABLED:
+    sock = Sock(app)
+    
+    @sock.route('/ws')
+    def ws_stream(ws):
+        """Push dashboard updates over a WebSocket (closed with 1013 when all
+        stream slots are taken)."""
+        if not _STREAM_SLOTS.acquire(blocking=False):
+            ws.close(reason=1013, message='Too many streams')
+            return
+        try:
+            for msg in _iter_dashboard_messages():
+                ws.send(msg.decode('utf-8'))
+        finally:
+            _STREAM_SLOTS.release()
 
 
 # HTML Template
@@ -536,9 +1004,14 @@ DASHBOARD_HTML = """
     </div>
     
     <script>
+        // toLocaleString() builds a new formatter on every call; these are
+        // built once and reused for every cell
+        const MONEY = new Intl.NumberFormat('en-US', {minimumFractionDigits: 2, maximumFractionDigits: 2});
+        const COUNT = new Intl.NumberFormat('en-US');
+        
         function formatCurrency(value) {
             if (value == null || isNaN(value)) return '$0.00';
-            return '$' + value.toLocaleString('en-US', {minimumFractionDigits: 2, maximumFractionDigits: 2});
+            return '$' + MONEY.format(value);
         }
         
         function formatPercent(value) {
@@ -554,196 +1027,415 @@ DASHBOARD_HTML = """
             return `${minutes}m`;
         }
         
-        function updateStatus() {
-            fetch('/api/status')
-                .then(r => r.json())
-                .then(data => {
-                    // IB Connection
-                    const ibIndicator = document.getElementById('ib-indicator');
-                    const ibStatus = document.getElementById('ib-status');
-                    if (data.ib_connected) {
-                        ibIndicator.className = 'indicator green';
-                        ibStatus.textContent = 'Connected';
-                    } else {
-                        ibIndicator.className = 'indicator red';
-                        ibStatus.textContent = 'Disconnected';
-                    }
-                    
-                    // Market Phase
-                    const marketPhase = document.getElementById('market-phase');
-                    marketPhase.textContent = data.market_phase.toUpperCase();
-                    
-                    // Subscriptions
-                    const subCount = document.getElementById('subscription-count');
-                    subCount.textContent = `${data.subscriptions}/${data.max_subscriptions}`;
-                    
-                    // Uptime
-                    const uptime = document.getElementById('uptime');
-                    uptime.textContent = formatUptime(data.uptime);
-                })
-                .catch(err => console.error('Status fetch error:', err));
-        }
-        
-        function updatePositions() {
-            fetch('/api/positions')
-                .then(r => r.json())
-                .then(data => {
-                    const tbody = document.getElementById('positions-body');
-                    const countEl = document.getElementById('positions-count');
-                    const totalPnlEl = document.getElementById('total-pnl');
-                    
-                    countEl.textContent = data.count;
-                    
-                    if (data.positions.length === 0) {
-                        tbody.innerHTML = '<tr><td colspan="7" class="empty-state">No open positions</td></tr>';
-                        totalPnlEl.textContent = '$0.00';
-                        totalPnlEl.style.color = 'white';
-                        return;
-                    }
-                    
-                    const rows = data.positions.map(pos => {
-                        const pnlClass = pos.pnl >= 0 ? 'positive' : 'negative';
-                        return `
-                            <tr>
-                                <td class="symbol">${pos.symbol}</td>
-                                <td>${pos.qty}</td>
-                                <td>${formatCurrency(pos.avg)}</td>
-                                <td>${formatCurrency(pos.last)}</td>
-                                <td class="${pnlClass}">${formatCurrency(pos.pnl)}</td>
-                                <td class="${pnlClass}">${formatPercent(pos.pnl_pct)}</td>
-                                <td>${pos.sec_type}</td>
-                            </tr>
-                        `;
-                    });
-                    
-                    tbody.innerHTML = rows.join('');
-                    
-                    // Update total P&L
-                    totalPnlEl.textContent = formatCurrency(data.total_pnl);
-                    totalPnlEl.style.color = data.total_pnl >= 0 ? '#22c55e' : '#ef4444';
-                })
-                .catch(err => console.error('Positions fetch error:', err));
-        }
-        
-        function updateFutures() {
-            fetch('/api/futures')
-                .then(r => r.json())
-                .then(data => {
-                    const tbody = document.getElementById('futures-body');
-                    
-                    if (data.futures.length === 0) {
-                        tbody.innerHTML = '<tr><td colspan="4" class="empty-state">No futures data</td></tr>';
-                        return;
-                    }
-                    
-                    const rows = data.futures.map(fut => {
-                        const ageClass = fut.age < 30 ? 'positive' : (fut.age < 60 ? 'neutral' : 'negative');
-                        return `
-                            <tr>
-                                <td class="symbol">${fut.symbol}</td>
-                                <td>${formatCurrency(fut.last)}</td>
-                                <td>${fut.multiplier}x</td>
-                                <td class="${ageClass}">${fut.age}s</td>
-                            </tr>
-                        `;
-                    });
-                    
-                    tbody.innerHTML = rows.join('');
-                })
-                .catch(err => console.error('Futures fetch error:', err));
-        }
-        
-        function updateScanner() {
-            fetch('/api/scanner')
-                .then(r => r.json())
-                .then(data => {
-                    const tbody = document.getElementById('scanner-body');
-                    const countEl = document.getElementById('scanner-count');
-                    
-                    countEl.textContent = data.count;
-                    
-                    if (data.results.length === 0) {
-                        tbody.innerHTML = '<tr><td colspan="7" class="empty-state">Waiting for scan results...</td></tr>';
-                        return;
-                    }
-                    
-                    const rows = data.results.map(res => {
-                        const gradeClass = `score-${res.grade.toLowerCase()}`;
-                        const breakdown = res.breakdown || {};
-                        return `
-                            <tr>
-                                <td class="symbol">${res.symbol}</td>
-                                <td><strong>${res.total_score}</strong></td>
-                                <td><span class="score-badge ${gradeClass}">${res.grade}</span></td>
-                                <td>${formatCurrency(res.last || 0)}</td>
-                                <td>${(breakdown.relative_strength || 0).toFixed(1)}</td>
-                                <td>${(breakdown.volume || 0).toFixed(1)}</td>
-                                <td>${(breakdown.momentum || 0).toFixed(1)}</td>
-                            </tr>
-                        `;
-                    });
-                    
-                    tbody.innerHTML = rows.join('');
-                })
-                .catch(err => console.error('Scanner fetch error:', err));
-        }
-        
-        function updateOptions() {
-            fetch('/api/options')
-                .then(r => r.json())
-                .then(data => {
-                    const tbody = document.getElementById('options-body');
-                    const countEl = document.getElementById('options-count');
-                    
-                    countEl.textContent = data.count;
-                    
-                    if (data.options.length === 0) {
-                        tbody.innerHTML = '<tr><td colspan="7" class="empty-state">Waiting for options scan...</td></tr>';
-                        return;
+        function renderStatus(data) {
+            // IB Connection
+            const ibIndicator = document.getElementById('ib-indicator');
+            const ibStatus = document.getElementById('ib-status');
+            if (data.ib_connected) {
+                ibIndicator.className = 'indicator green';
+                ibStatus.textContent = 'Connected';
+            } else {
+                ibIndicator.className = 'indicator red';
+                ibStatus.textContent = 'Disconnected';
+            }
+            
+            // Market Phase
+            const marketPhase = document.getElementById('market-phase');
+            marketPhase.textContent = data.market_phase.toUpperCase();
+            
+            // Subscriptions
+            const subCount = document.getElementById('subscription-count');
+            subCount.textContent = `${data.subscriptions}/${data.max_subscriptions}`;
+            
+            // Uptime
+            const uptime = document.getElementById('uptime');
+            uptime.textContent = formatUptime(data.uptime);
+        }
+        
+        // Keyed in-place table update: rows are matched by key and only the
+        // cells whose content or class changed are written. cellsOf(item)
+        // returns [content, className, isHtml] per column.
+        function syncRows(tbody, items, keyOf, cellsOf, emptyText) {
+            const rowMap = tbody._rowMap || (tbody._rowMap = new Map());
+            if (items.length === 0) {
+                rowMap.clear();
+                const colspan = tbody.parentElement.querySelectorAll('th').length;
+                tbody.innerHTML = `<tr><td colspan="${colspan}" class="empty-state">${emptyText}</td></tr>`;
+                return;
+            }
+            // First fill (or refill after the empty state): build every row
+            // off-document and attach them in one operation
+            const frag = rowMap.size === 0 ? document.createDocumentFragment() : null;
+            
+            const seen = new Set();
+            items.forEach((item, i) => {
+                let key = keyOf(item);
+                if (seen.has(key)) key += '#' + i;
+                seen.add(key);
+                let tr = rowMap.get(key);
+                if (tr && tr._item === item) {
+                    // Same row object as last render (untouched by a delta)
+                    if (tbody.children[i] !== tr) tbody.insertBefore(tr, tbody.children[i] || null);
+                    return;
+                }
+                const cells = cellsOf(item);
+                if (!tr) {
+                    tr = document.createElement('tr');
+                    tr.dataset.key = key;
+                    for (let j = 0; j < cells.length; j++) tr.appendChild(document.createElement('td'));
+                    rowMap.set(key, tr);
+                }
+                tr._item = item;
+                cells.forEach(([content, cls = '', isHtml], j) => {
+                    const td = tr.children[j];
+                    if (td._content !== content) {
+                        if (isHtml) td.innerHTML = content;
+                        else td.textContent = content;
+                        td._content = content;
                     }
-                    
-                    const rows = data.options.map(opt => {
-                        const sweepFlag = opt.is_sweep ? '🔥' : '';
-                        return `
-                            <tr>
-                                <td class="symbol">${opt.contract_label}</td>
-                                <td><strong>${opt.score}</strong></td>
-                                <td>${opt.volume.toLocaleString()}</td>
-                                <td>${opt.oi.toLocaleString()}</td>
-                                <td>${formatCurrency(opt.premium)}</td>
-                                <td>${(opt.iv * 100).toFixed(1)}%</td>
-                                <td>${sweepFlag}</td>
-                            </tr>
-                        `;
-                    });
-                    
-                    tbody.innerHTML = rows.join('');
-                })
-                .catch(err => console.error('Options fetch error:', err));
+                    if (td.className !== cls) td.className = cls;
+                });
+                if (frag) frag.appendChild(tr);
+                else if (tbody.children[i] !== tr) tbody.insertBefore(tr, tbody.children[i] || null);
+            });
+            if (frag) {
+                tbody.replaceChildren(frag);  // also drops the empty-state row
+                return;
+            }
+            
+            for (const [key, tr] of rowMap) {
+                if (!seen.has(key)) {
+                    tr.remove();
+                    rowMap.delete(key);
+                }
+            }
+        }
+        
+        function renderPositions(data) {
+            const tbody = document.getElementById('positions-body');
+            const totalPnlEl = document.getElementById('total-pnl');
+            
+            document.getElementById('positions-count').textContent = data.count;
+            syncRows(tbody, data.positions, pos => pos.symbol, positionCells, 'No open positions');
+            
+            if (data.positions.length === 0) {
+                totalPnlEl.textContent = '$0.00';
+                totalPnlEl.style.color = 'white';
+                return;
+            }
+            totalPnlEl.textContent = formatCurrency(data.total_pnl);
+            totalPnlEl.style.color = data.total_pnl >= 0 ? '#22c55e' : '#ef4444';
+        }
+        
+        function positionCells(pos) {
+            const pnlClass = pos.pnl >= 0 ? 'positive' : 'negative';
+            return [
+                [pos.symbol, 'symbol'],
+                [`${pos.qty}`],
+                [formatCurrency(pos.avg)],
+                [formatCurrency(pos.last)],
+                [formatCurrency(pos.pnl), pnlClass],
+                [formatPercent(pos.pnl_pct), pnlClass],
+                [pos.sec_type],
+            ];
+        }
+        
+        function renderFutures(data) {
+            const tbody = document.getElementById('futures-body');
+            syncRows(tbody, data.futures, fut => fut.symbol, futureCells, 'No futures data');
+        }
+        
+        function futureCells(fut) {
+            const ageClass = fut.age < 30 ? 'positive' : (fut.age < 60 ? 'neutral' : 'negative');
+            return [
+                [fut.symbol, 'symbol'],
+                [formatCurrency(fut.last)],
+                [`${fut.multiplier}x`],
+                [`${fut.age}s`, ageClass],
+            ];
+        }
+        
+        function renderScanner(data) {
+            const tbody = document.getElementById('scanner-body');
+            document.getElementById('scanner-count').textContent = data.count;
+            syncRows(tbody, data.results, res => res.symbol, scannerCells, 'Waiting for scan results...');
+        }
+        
+        function scannerCells(res) {
+            const gradeClass = `score-${res.grade.toLowerCase()}`;
+            const breakdown = res.breakdown || {};
+            return [
+                [res.symbol, 'symbol'],
+                [`<strong>${res.total_score}</strong>`, '', true],
+                [`<span class="score-badge ${gradeClass}">${res.grade}</span>`, '', true],
+                [formatCurrency(res.last || 0)],
+                [(breakdown.relative_strength || 0).toFixed(1)],
+                [(breakdown.volume || 0).toFixed(1)],
+                [(breakdown.momentum || 0).toFixed(1)],
+            ];
+        }
+        
+        function renderOptions(data) {
+            const tbody = document.getElementById('options-body');
+            document.getElementById('options-count').textContent = data.count;
+            syncRows(tbody, data.options, opt => opt.contract_label, optionCells, 'Waiting for options scan...');
+        }
+        
+        function optionCells(opt) {
+            return [
+                [opt.contract_label, 'symbol'],
+                [`<strong>${opt.score}</strong>`, '', true],
+                [COUNT.format(opt.volume)],
+                [COUNT.format(opt.oi)],
+                [formatCurrency(opt.premium)],
+                [`${(opt.iv * 100).toFixed(1)}%`],
+                [opt.is_sweep ? '🔥' : ''],
+            ];
+        }
+        
+        const RENDERERS = {
+            status: renderStatus,
+            positions: renderPositions,
+            futures: renderFutures,
+            scanner: renderScanner,
+            options: renderOptions,
+        };
+        
+        // DOM writes are deferred to one requestAnimationFrame callback, so
+        // every section updated in the same frame shares a single layout and
+        // paint. Only the newest data per section is kept.
+        const pendingRenders = new Map();
+        let frameRequested = false;
+        
+        function queueRender(name, data) {
+            pendingRenders.set(name, data);
+            if (!frameRequested) {
+                frameRequested = true;
+                requestAnimationFrame(flushRenders);
+            }
+        }
+        
+        function flushRenders() {
+            frameRequested = false;
+            for (const [name, data] of pendingRenders) RENDERERS[name](data);
+            pendingRenders.clear();
+        }
+        
+        function renderAll(data) {
+            for (const name in RENDERERS) queueRender(name, data[name]);
+        }
+        
+        // Row sections the push channels patch by index: {section: list key}
+        const ROW_KEYS = {positions: 'positions', futures: 'futures'};
+        
+        let model = null;  // last full dashboard payload, kept current by deltas
+        
+        function applyDelta(changes) {
+            for (const c of changes) {
+                if (c.type === 'section') {
+                    model[c.section] = c.data;
+                } else {
+                    const section = model[c.section];
+                    const list = section[ROW_KEYS[c.section]];
+                    Object.assign(section, c.meta);
+                    for (const [i, row] of c.rows) list[i] = row;
+                }
+                // syncRows only touches the cells that actually changed
+                queueRender(c.section, model[c.section]);
+            }
+        }
+        
+        function onPushMessage(e) {
+            const msg = JSON.parse(e.data);
+            if (msg.type === 'full') {
+                model = msg.data;
+                renderAll(model);
+            } else if (model) {
+                applyDelta(msg.changes);
+            }
         }
         
+        // One request for all five sections. The ETag is sent back by hand
+        // (bypassing the HTTP cache) so an unchanged snapshot comes back as
+        // a bodyless 304 and nothing is parsed or rendered.
+        let snapshotEtag = null;
+        
         function updateAll() {
-            updateStatus();
-            updatePositions();
-            updateFutures();
-            updateScanner();
-            updateOptions();
+            const headers = snapshotEtag ? {'If-None-Match': snapshotEtag} : {};
+            fetch('/api/snapshot', {cache: 'no-store', headers})
+                .then(r => {
+                    if (r.status === 304) return null;
+                    snapshotEtag = r.headers.get('ETag');
+                    return r.json();
+                })
+                .then(data => { if (data) renderAll(data); })
+                .catch(err => console.error('Snapshot fetch error:', err));
         }
         
-        // Initial load
-        updateAll();
+        // Server pushes updates whenever state changes (full payload, then
+        // deltas). Prefer the WebSocket when the server offers /ws; if it
+        // can't be opened use Server-Sent Events, and if that fails too fall back to polling
+        // /api/snapshot every 2 seconds (also when the server has no free
+        // stream slot). Hidden tabs drop their push connection (it holds
+        // a server thread) and slow polling to 10 seconds.
+        const wsEnabled = __WS_ENABLED__;  // set by the server at import
+        let mode = null;       // transport in use: 'ws', 'sse' or 'poll'
+        let conn = null;       // open WebSocket/EventSource, null while paused
+        let pollTimer = null;
+        
+        function startPolling() {
+            mode = 'poll';
+            conn = null;
+            clearInterval(pollTimer);
+            if (!document.hidden) updateAll();
+            pollTimer = setInterval(updateAll, document.hidden ? 10000 : 2000);
+        }
         
-        // Refresh every 2 seconds
-        setInterval(updateAll, 2000);
+        function startEventSource() {
+            if (!window.EventSource) return startPolling();
+            mode = 'sse';
+            const stream = conn = new EventSource('/api/stream');
+            stream.onmessage = onPushMessage;
+            stream.onerror = () => {
+                if (stream === conn && stream.readyState === EventSource.CLOSED) startPolling();
+            };
+        }
+        
+        function startWebSocket() {
+            if (!wsEnabled || !window.WebSocket) return startEventSource();
+            mode = 'ws';
+            const proto = location.protocol === 'https:' ? 'wss://' : 'ws://';
+            const ws = conn = new WebSocket(proto + location.host + '/ws');
+            let opened = false;
+            ws.onopen = () => { opened = true; };
+            ws.onmessage = onPushMessage;
+            ws.onclose = (e) => {
+                if (ws !== conn) return;  // closed on purpose (tab hidden)
+                // Never opened: server has no /ws; 1013: server is full;
+                // otherwise reconnect
+                if (!opened) startEventSource();
+                else if (e.code === 1013) startPolling();
+                else setTimeout(() => { if (ws === conn) startWebSocket(); }, 2000);
+            };
+        }
+        
+        document.addEventListener('visibilitychange', () => {
+            if (mode === 'poll') {
+                startPolling();
+            } else if (document.hidden) {
+                const c = conn;
+                conn = null;
+                if (c) c.close();
+            } else if (!conn) {
+                // Reconnecting sends a fresh full snapshot
+                if (mode === 'ws') startWebSocket();
+                else startEventSource();
+            }
+        });
+        
+        startWebSocket();
     </script>
 </body>
 </html>
 """
 
+def _minify_html(html: str) -> str:
+    """
+    Drop comments, indentation and blank lines from the dashboard page.
+    Line breaks are kept so inline JS (ASI, trailing // comments) still works.
+    """
+    html = re.sub(r'<!--.*?-->', '', html, flags=re.S)
+    html = re.sub(r'/\*.*?\*/', '', html, flags=re.S)
+    lines = (line.strip() for line in html.splitlines())
+    return '\n'.join(line for line in lines if line and not line.startswith('//'))
+
+
+# DASHBOARD_HTML's only placeholder is fixed at import, so minify, encode
+# and compress it once: {Content-Encoding: (body, etag)}
+_DASHBOARD_BYTES = _minify_html(
+    DASHBOARD_HTML.replace('__WS_ENABLED__', 'true' if _WS_ENABLED else 'false')
+).encode('utf-8')
+_DASHBOARD_ETAG = hashlib.sha1(_DASHBOARD_BYTES).hexdigest()[:16]
+_DASHBOARD_VARIANTS = {
+    '': (_DASHBOARD_BYTES, _DASHBOARD_ETAG),
+    'gzip': (gzip.compress(_DASHBOARD_BYTES, compresslevel=9), _DASHBOARD_ETAG + '-gz'),
+}
+if _BROTLI_AVAILABLE:
+    _DASHBOARD_VARIANTS['br'] = (brotli.compress(_DASHBOARD_BYTES, quality=11), _DASHBOARD_ETAG + '-br')
+if _ZSTD_AVAILABLE:
+    _DASHBOARD_VARIANTS['zstd'] = (
+        zstandard.ZstdCompressor(level=19).compress(_DASHBOARD_BYTES), _DASHBOARD_ETAG + '-zst')
+
+
+def publish_snapshots(writer):
+    """Publish each new /api/snapshot body for a process-mode dashboard (blocks)."""
+    for body, _ in _iter_dashboard_updates():
+        writer.publish(body)
+
+
+def publish_heartbeats(writer):
+    """Publish each new heartbeat for a process-mode dashboard (blocks)."""
+    published = None
+    v = None
+    while True:
+        v = STATE.wait_version(v, timeout=_STREAM_REFRESH_SEC)
+        hv = STATE.version('heartbeat')
+        if hv != published:
+            writer.publish(_dumps(STATE.get_heartbeat()))
+            published = hv
+        time.sleep(_RESPONSE_TTL)
+
+
+# Per-section routes answered from the shared snapshot in process mode
+# (/api/heartbeat is published to its own block, see publish_heartbeats)
+_SHARED_ROUTES = {
+    '/api/status': 'status',
+    '/api/positions': 'positions',
+    '/api/futures': 'futures',
+    '/api/scanner': 'scanner',
+    '/api/options': 'options',
+}
+
+
+@app.before_request
+def _shared_section():
+    """In process mode, serve the section routes from the shared snapshot."""
+    if _SHARED is None:
+        return None
+    name = _SHARED_ROUTES.get(request.path)
+    if name is None:
+        return None
+    return _cached_json('shared.' + name, lambda: _dashboard_payload()[name])
+
+
+def run_dashboard_process(shm_name: str, hb_shm_name: str):
+    """Process entry point: serve the dashboard from the snapshot and heartbeat
+    the trading process publishes to shared memory (see state_shm)."""
+    global _SHARED, _SHARED_HB
+    _SHARED = SnapshotReader(shm_name)
+    _SHARED_HB = SnapshotReader(hb_shm_name)
+    while _SHARED.seq() == 0 or _SHARED_HB.seq() == 0:  # nothing published yet
+        time.sleep(_SHARED_POLL_SEC)
+    run_dashboard()
+
 
 def run_dashboard():
-    """Start the dashboard server."""
+    """Start the dashboard server (waitress when installed, else Flask dev server)."""
     logger.info(f"Starting dashboard on {DASHBOARD_HOST}:{DASHBOARD_PORT}")
+    if _USE_WAITRESS:
+        # Runs in-process (STATE is a module singleton shared with the IB
+        # loop), so no forking servers or gevent monkey-patching here
+        _waitress_serve(
+            app,
+            host=DASHBOARD_HOST,
+            port=DASHBOARD_PORT,
+            threads=DASHBOARD_THREADS,
+            connection_limit=DASHBOARD_CONNECTION_LIMIT,
+            channel_timeout=DASHBOARD_KEEPALIVE_SEC,
+            _quiet=True,
+        )
+        return
+    # Werkzeug's threaded server speaks HTTP/1.1, so polls reuse the socket
     app.run(
         host=DASHBOARD_HOST,
         port=DASHBOARD_PORT,
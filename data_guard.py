@@ -1,13 +1,67 @@
+import math
 import time
 
+import numpy as np
+
+_NS = 1_000_000_000
+
+# Tick timestamps arrive as time.time() seconds and are compared against
+# the wall clock too (integer ns), so a clock step moves both sides alike.
+
+# Loop-tick clock (wall ns): the owning loop calls refresh_now() once per
+# iteration so freshness checks share one clock read. 0 means "not driven
+# by a loop".
+_NOW = [0]
+
+def refresh_now() -> int:
+    _NOW[0] = now = time.time_ns()
+    return now
+
+def _now() -> int:
+    return _NOW[0] or time.time_ns()
+
 class StalenessGuard:
-    def __init__(self, max_age_sec: int):
+    """
+    Last-tick time per symbol (wall ns), kept in one int64 array so
+    freshness for many symbols is a single vectorized compare (fresh_mask).
+    """
+    def __init__(self, max_age_sec: int, symbols=()):
         self.max_age = max_age_sec
-        self.last_ts = {}
+        self.max_age_ns = int(max_age_sec * _NS)
+        # Slot 0 is never written and stands in for never-seen symbols
+        self._idx = {}
+        self.last_ts = np.full(max(len(symbols) + 1, 64), np.iinfo(np.int64).min // 2, dtype=np.int64)
+        for sym in symbols:
+            self._slot(sym)
+
+    def _slot(self, sym: str) -> int:
+        i = self._idx.get(sym)
+        if i is None:
+            i = self._idx[sym] = len(self._idx) + 1
+            if i >= len(self.last_ts):
+                self.last_ts = np.concatenate([self.last_ts, np.full_like(self.last_ts, self.last_ts[0])])
+        return i
 
     def on_tick(self, sym: str, ts: float):
-        self.last_ts[sym] = ts
+        """Record a tick; ts is time.time() seconds, as MarketDataBus reports it.
+        A missing (None/NaN) ts marks the symbol as never seen."""
+        i = self._slot(sym)
+        self.last_ts[i] = int(ts * _NS) if ts is not None and math.isfinite(ts) else self.last_ts[0]
+
+    def on_ticks(self, syms, ts_values):
+        """Record one timestamp per symbol in a single array write."""
+        idx = [self._slot(s) for s in syms]
+        ts = np.asarray(ts_values, dtype=np.float64)
+        ok = np.isfinite(ts)
+        ns = np.full(ts.shape, self.last_ts[0], dtype=np.int64)
+        ns[ok] = (ts[ok] * _NS).astype(np.int64)
+        self.last_ts[idx] = ns
+
+    def fresh_mask(self, syms) -> np.ndarray:
+        """Boolean array: is_fresh() for each of syms, computed in one pass."""
+        get = self._idx.get
+        idx = np.fromiter((get(s, 0) for s in syms), dtype=np.intp, count=len(syms))
+        return (_now() - self.last_ts[idx]) <= self.max_age_ns
 
     def is_fresh(self, sym: str) -> bool:
-        ts = self.last_ts.get(sym, 0)
-        return (time.time() - ts) <= self.max_age
+        return (_now() - int(self.last_ts[self._idx.get(sym, 0)])) <= self.max_age_ns
@@ -21,9 +21,9 @@ for symbol, pos in STATE.positions.items():
 
 print("\n--- PRICES ---")
 print(f"Total prices: {len(STATE.prices)}")
-for symbol, price_data in list(STATE.prices.items())[:15]:  # Show first 15
-    last = price_data.get('last')
-    age = price_data.get('age', 999)
+for symbol, quote in list(STATE.prices.items())[:15]:  # Show first 15
+    last = quote.last
+    age = quote.age
     print(f"  {symbol}: ${last if last else 0:.2f} (age: {age}s)")
 
 print("\n--- SUBSCRIPTIONS ---")
@@ -44,20 +44,27 @@ print("\n=" * 60)
 print("Press Ctrl+C to exit")
 print("=" * 60)
 
+WATCH_SYMBOLS = ['NQ', 'ES', 'CL', 'GC', 'NQZ5', 'ESZ5', 'CLZ5', 'GCZ5']
+
 # Keep running
 try:
+    last_version = None
     while True:
         time.sleep(5)
         
-        # Update display every 5 seconds
-        print(f"\n[{time.strftime('%H:%M:%S')}] Positions: {len(STATE.positions)} | Prices: {len(STATE.prices)} | Subs: {len(STATE.symbols_subscribed)}")
+        # Update display every 5 seconds, only when STATE changed
+        version = STATE.version()
+        if version == last_version:
+            continue
+        last_version = version
+        
+        lines = [f"\n[{time.strftime('%H:%M:%S')}] Positions: {len(STATE.positions)} | Prices: {len(STATE.prices)} | Subs: {len(STATE.symbols_subscribed)}"]
         
         # Show if any futures have prices
-        for sym in ['NQ', 'ES', 'CL', 'GC', 'NQZ5', 'ESZ5', 'CLZ5', 'GCZ5']:
-            if sym in STATE.prices:
-                price = STATE.prices[sym].get('last')
-                age = STATE.prices[sym].get('age', 999)
-                print(f"  {sym}: ${price if price else 0:.2f} (age: {age}s)")
+        prices = STATE.prices
+        lines += [f"  {sym}: ${q.last if q.last else 0:.2f} (age: {q.age}s)"
+                  for sym in WATCH_SYMBOLS if (q := prices.get(sym)) is not None]
+        print("\n".join(lines))
 
 except KeyboardInterrupt:
     print("\nDebug stopped")
@@ -18,7 +18,7 @@ except Exception as e:
         def isConnected(self): return self._connected
         def serverVersion(self): return 0
         def serverTime(self): return None
-        def qualifyContracts(self, c): return [c]
+        def qualifyContracts(self, *c): return list(c)
         def positions(self): return []
         def reqPositions(self): return []
         def reqMarketDataType(self, *_a, **_k): pass
@@ -33,26 +33,40 @@ except Exception as e:
     class Forex(Contract): ...
     def util_datetime(_): return None
 
-from config import IB_HOST, IB_PORT, IB_CLIENT_ID
+from config import IB_HOST, IB_PORT, IB_CLIENT_ID, IB_READONLY
 
 @dataclass
 class IBConnectionInfo:
     host: str
     port: int
     client_id: int
+    readonly: bool = True
+
+@dataclass(slots=True)
+class IBPosition:
+    """One account position, as returned by IBClient.fetch_positions()."""
+    symbol: str
+    conId: Optional[int]
+    qty: float
+    avgCost: float
+    contract: Any
+    sec_type: str = "STK"
+    local_symbol: str = ""
 
 class IBClient:
     """Thin wrapper around ib_insync.IB for QTrade v15B."""
     def __init__(self, info: Optional[IBConnectionInfo] = None):
-        self.info = info or IBConnectionInfo(IB_HOST, IB_PORT, IB_CLIENT_ID)
+        self.info = info or IBConnectionInfo(IB_HOST, IB_PORT, IB_CLIENT_ID, bool(IB_READONLY))
         self.ib = IB()
         self._md_type_set = False
+        # Qualified stock contracts: {(symbol, exchange, currency, secType): Contract}
+        self._qualified: Dict[tuple, Contract] = {}
 
     # ---------- connection ----------
     def connect(self):
         """
-        Connect with readonly=True to skip slow execution requests.
-        This prevents timeout errors when TWS is slow to respond.
+        Connect with readonly=True (the default, see IB_READONLY) to skip slow
+        execution requests. This prevents timeout errors when TWS is slow to respond.
         """
         if self.ib.isConnected():
             return self.ib
@@ -63,7 +77,7 @@ class IBClient:
                 self.info.host, 
                 self.info.port, 
                 clientId=self.info.client_id,
-                readonly=True  # <-- KEY FIX
+                readonly=self.info.readonly  # <-- KEY FIX
             )
             
             if hasattr(self.ib, "reqMarketDataType"):
@@ -75,7 +89,8 @@ class IBClient:
             
             sv = getattr(self.ib, 'serverVersion', lambda: None)()
             st = getattr(self.ib, 'serverTime', lambda: None)()
-            logger.info(f"Connected to IB @ {self.info.host}:{self.info.port} cid={self.info.client_id} sv={sv} (readonly)")
+            mode = " (readonly)" if self.info.readonly else ""
+            logger.info(f"Connected to IB @ {self.info.host}:{self.info.port} cid={self.info.client_id} sv={sv}{mode}")
             
         except Exception as e:
             logger.exception("IB connect failed")
@@ -104,11 +119,20 @@ class IBClient:
         return contract
 
     def stock(self, symbol: str, exchange: str = "SMART", currency: str = "USD") -> Contract:
-        return self.qualify_contract(Stock(symbol, exchange=exchange, currency=currency))
+        """Qualified stock contract; each symbol costs one IB round-trip per session."""
+        key = (symbol, exchange, currency, "STK")
+        contract = self._qualified.get(key)
+        if contract is None:
+            contract = self.qualify_contract(Stock(symbol, exchange=exchange, currency=currency))
+            if getattr(contract, 'conId', 0):  # don't cache failed qualifications
+                self._qualified[key] = contract
+        return contract
+
+    qualify_stock = stock
 
     # ---------- account/positions ----------
-    def fetch_positions(self) -> List[Dict[str, Any]]:
-        """Return a list of positions as dicts."""
+    def fetch_positions(self) -> List[IBPosition]:
+        """Return the account positions."""
         data = []
         try:
             positions = []
@@ -123,22 +147,20 @@ class IBClient:
                 except Exception:
                     positions = []
 
+            append = data.append
             for p in positions:
                 contract = getattr(p, 'contract', None)
-                sym = getattr(contract, 'localSymbol', None) or getattr(contract, 'symbol', None) or "?"
-                
-                # Get security type for v15 compatibility
-                sec_type = getattr(contract, 'secType', 'STK')
-                
-                data.append({
-                    "symbol": sym,
-                    "conId": getattr(contract, 'conId', None),
-                    "qty": float(getattr(p, 'position', 0.0)),
-                    "avgCost": float(getattr(p, 'avgCost', 0.0)),
-                    "contract": contract,
-                    "sec_type": sec_type,  # Add for v15
-                    "local_symbol": getattr(contract, 'localSymbol', sym),  # Add for v15
-                })
+                local = getattr(contract, 'localSymbol', None)
+                sym = local or getattr(contract, 'symbol', None) or "?"
+                append(IBPosition(
+                    sym,
+                    getattr(contract, 'conId', None),
+                    float(getattr(p, 'position', 0.0)),
+                    float(getattr(p, 'avgCost', 0.0)),
+                    contract,
+                    getattr(contract, 'secType', 'STK'),  # v15 compatibility
+                    sym if local is None else local,
+                ))
         except Exception as e:
             logger.warning(f"fetch_positions failed: {e}")
         return data
@@ -164,6 +186,26 @@ class IBClient:
             logger.warning(f"last_close_from_history failed: {e}")
         return None
 
+    async def last_close_from_history_async(self, contract: Contract, duration: str = "1 D", bar: str = "5 mins") -> Optional[float]:
+        """Async last_close_from_history, for callers already on the IB event loop."""
+        try:
+            bars = await self.ib.reqHistoricalDataAsync(
+                contract,
+                endDateTime="",
+                durationStr=duration,
+                barSizeSetting=bar,
+                whatToShow="TRADES",
+                useRTH=0,
+                formatDate=1,
+                keepUpToDate=False,
+                chartOptions=[],
+            )
+            if bars:
+                return float(bars[-1].close)
+        except Exception as e:
+            logger.warning(f"last_close_from_history failed: {e}")
+        return None
+
     # ---------- passthroughs ----------
     def req_mkt_data(self, contract: Contract, genericTickList: str = "", snapshot: bool = False, regulatorySnapshot: bool = False):
         return self.ib.reqMktData(contract, genericTickList, snapshot, regulatorySnapshot)
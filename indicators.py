@@ -3,18 +3,53 @@ import logging
 import math
 from typing import List, Optional
 
+import numpy as np
+
+try:
+    from numba import njit
+    _NUMBA_AVAILABLE = True
+except Exception:
+    _NUMBA_AVAILABLE = False
+    
+    def njit(*args, **kwargs):
+        """No-op stand-in for numba.njit (plain Python fallback)."""
+        if len(args) == 1 and callable(args[0]):
+            return args[0]
+        return lambda fn: fn
+
 logger = logging.getLogger(__name__)
 
+
+@njit(cache=True)
+def _wilder_smooth(arr, period):
+    """Wilder's smoothing of arr: SMA of the first period, then
+    v = (v * (period - 1) + x) / period for each later value."""
+    n = arr.shape[0]
+    s = 0.0
+    for i in range(period):
+        s += arr[i]
+    v = s / period
+    for i in range(period, n):
+        v = (v * (period - 1) + arr[i]) / period
+    return v
+
+
+def _clean_array(values) -> np.ndarray:
+    """values as a float64 array with NaNs dropped."""
+    a = np.asarray(values, dtype=np.float64)
+    return a[~np.isnan(a)]
+
+
 def ema(values: List[float], period: int) -> float:
     """
     Exponential Moving Average.
     Returns NaN if insufficient data.
     """
-    if not values or len(values) < period:
+    if len(values) == 0 or len(values) < period:
         return math.nan
     
-    # Filter out NaN values
-    clean_values = [v for v in values if not math.isnan(v)]
+    # Filter out NaN values (vectorized; the recurrence below runs on floats)
+    clean_values = _clean_array(values).tolist()
     if len(clean_values) < period:
         return math.nan
     
@@ -27,19 +62,47 @@ def ema(values: List[float], period: int) -> float:
     return e
 
 
+class StreamingEMA:
+    """
+    EMA updated one value at a time: O(1) per sample instead of rescanning
+    the series. Seeded with the SMA of the first `period` values; NaN until then.
+    """
+    __slots__ = ('k', 'v', 'warm', 'buf', 'period')
+    
+    def __init__(self, period: int):
+        self.period = period
+        self.k = 2.0 / (period + 1)
+        self.v = math.nan
+        self.warm = False
+        self.buf = []
+    
+    def update(self, x: float) -> float:
+        if x != x:  # NaN samples are skipped, as in ema()
+            return self.v
+        if self.warm:
+            self.v = x * self.k + self.v * (1 - self.k)
+        else:
+            self.buf.append(x)
+            if len(self.buf) == self.period:
+                self.v = sum(self.buf) / self.period
+                self.warm = True
+                self.buf = None
+        return self.v
+
+
 def sma(values: List[float], period: int) -> float:
     """
     Simple Moving Average.
     Returns NaN if insufficient data.
     """
-    if not values or len(values) < period:
+    if len(values) == 0 or len(values) < period:
         return math.nan
     
-    clean_values = [v for v in values if not math.isnan(v)]
-    if len(clean_values) < period:
+    a = _clean_array(values)
+    if len(a) < period:
         return math.nan
     
-    return sum(clean_values[-period:]) / period
+    return float(a[-period:].mean())
 
 
 def true_range(high: float, low: float, prev_close: float) -> float:
@@ -47,14 +110,20 @@ def true_range(high: float, low: float, prev_close: float) -> float:
     Calculate True Range for a single bar.
     TR = max(high - low, abs(high - prev_close), abs(low - prev_close))
     """
-    if any(math.isnan(x) for x in [high, low, prev_close]):
+    # x != x is the NaN test, without a list, generator or call per input
+    if high != high or low != low or prev_close != prev_close:
         return math.nan
     
-    return max(
-        high - low,
-        abs(high - prev_close),
-        abs(low - prev_close)
-    )
+    hl = high - low
+    hc = high - prev_close
+    if hc < 0:
+        hc = -hc
+    lc = low - prev_close
+    if lc < 0:
+        lc = -lc
+    if hl >= hc and hl >= lc:
+        return hl
+    return hc if hc >= lc else lc
 
 
 def true_atr(highs: List[float], lows: List[float], closes: List[float], period: int = 14) -> float:
@@ -70,7 +139,7 @@ def true_atr(highs: List[float], lows: List[float], closes: List[float], period:
     Returns:
         ATR value or NaN if insufficient data
     """
-    if not highs or not lows or not closes:
+    if len(highs) == 0 or len(lows) == 0 or len(closes) == 0:
         return math.nan
     
     if len(highs) < period + 1 or len(lows) < period + 1 or len(closes) < period + 1:
@@ -80,23 +149,19 @@ def true_atr(highs: List[float], lows: List[float], closes: List[float], period:
         logger.warning(f"ATR: Mismatched lengths H={len(highs)} L={len(lows)} C={len(closes)}")
         return math.nan
     
-    # Calculate True Range for each bar
-    tr_values = []
-    for i in range(1, len(closes)):
-        tr = true_range(highs[i], lows[i], closes[i-1])
-        if not math.isnan(tr):
-            tr_values.append(tr)
+    # True Range for every bar at once (same formula as true_range());
+    # NaN inputs propagate through np.maximum and those bars are dropped
+    h = np.asarray(highs, dtype=np.float64)[1:]
+    l = np.asarray(lows, dtype=np.float64)[1:]
+    prev_c = np.asarray(closes, dtype=np.float64)[:-1]
+    tr = np.maximum(h - l, np.maximum(np.abs(h - prev_c), np.abs(l - prev_c)))
+    tr = tr[~np.isnan(tr)]
     
-    if len(tr_values) < period:
+    if len(tr) < period:
         return math.nan
     
     # Wilder's smoothing: first ATR is SMA, then exponential smoothing
-    atr = sum(tr_values[:period]) / period
-    
-    for tr in tr_values[period:]:
-        atr = ((atr * (period - 1)) + tr) / period
-    
-    return atr
+    return float(_wilder_smooth(tr, period))
 
 
 def rsi(values: List[float], period: int = 14) -> float:
@@ -110,37 +175,22 @@ def rsi(values: List[float], period: int = 14) -> float:
     Returns:
         RSI value (0-100) or NaN if insufficient data
     """
-    if not values or len(values) < period + 1:
+    if len(values) == 0 or len(values) < period + 1:
         return math.nan
     
-    clean_values = [v for v in values if not math.isnan(v)]
-    if len(clean_values) < period + 1:
+    a = _clean_array(values)
+    if len(a) < period + 1:
         return math.nan
     
-    # Calculate price changes
-    gains = []
-    losses = []
-    
-    for i in range(1, len(clean_values)):
-        change = clean_values[i] - clean_values[i-1]
-        if change > 0:
-            gains.append(change)
-            losses.append(0)
-        else:
-            gains.append(0)
-            losses.append(abs(change))
+    # Price changes split into gains and (positive) losses; no boolean
+    # masks: losses = max(change, 0) - change = max(-change, 0)
+    change = np.diff(a)
+    gains = np.maximum(change, 0.0)
+    losses = gains - change
     
-    if len(gains) < period:
-        return math.nan
-    
-    # Initial averages
-    avg_gain = sum(gains[:period]) / period
-    avg_loss = sum(losses[:period]) / period
-    
-    # Wilder's smoothing for remaining values
-    for i in range(period, len(gains)):
-        avg_gain = ((avg_gain * (period - 1)) + gains[i]) / period
-        avg_loss = ((avg_loss * (period - 1)) + losses[i]) / period
+    # Wilder's smoothing: initial SMA, then exponential smoothing
+    avg_gain = float(_wilder_smooth(gains, period))
+    avg_loss = float(_wilder_smooth(losses, period))
     
     if avg_loss == 0:
         return 100.0
@@ -164,27 +214,38 @@ def macd(values: List[float], fast: int = 12, slow: int = 26, signal: int = 9) -
     Returns:
         (macd_line, signal_line, histogram) or (nan, nan, nan)
     """
-    if not values or len(values) < slow:
+    if len(values) == 0 or len(values) < slow:
         return (math.nan, math.nan, math.nan)
     
-    # Calculate MACD line
-    macd_values = []
-    for i in range(slow, len(values) + 1):
-        window = values[:i]
-        fast_ema = ema(window, fast)
-        slow_ema = ema(window, slow)
-        if not math.isnan(fast_ema) and not math.isnan(slow_ema):
-            macd_values.append(fast_ema - slow_ema)
+    clean_values = _clean_array(values).tolist()
+    if len(clean_values) < slow:
+        return (math.nan, math.nan, math.nan)
+    
+    # Both EMAs in one forward pass, each seeded with the SMA of its
+    # first period; the MACD line starts once the slow EMA exists
+    kf = 2.0 / (fast + 1)
+    ks = 2.0 / (slow + 1)
+    fast_ema = sum(clean_values[:fast]) / fast
+    for v in clean_values[fast:slow]:
+        fast_ema += (v - fast_ema) * kf
+    slow_ema = sum(clean_values[:slow]) / slow
+    
+    macd_values = [0.0] * (len(clean_values) - slow + 1)
+    macd_values[0] = fast_ema - slow_ema
+    for i, v in enumerate(clean_values[slow:], 1):
+        fast_ema += (v - fast_ema) * kf
+        slow_ema += (v - slow_ema) * ks
+        macd_values[i] = fast_ema - slow_ema
     
     if len(macd_values) < signal:
         return (math.nan, math.nan, math.nan)
-    
-    # Calculate signal line
-    signal_line = ema(macd_values, signal)
     macd_line = macd_values[-1]
     
-    if math.isnan(signal_line):
-        return (macd_line, math.nan, math.nan)
+    # Signal line: EMA of the MACD line, seeded the same way
+    k = 2.0 / (signal + 1)
+    signal_line = sum(macd_values[:signal]) / signal
+    for m in macd_values[signal:]:
+        signal_line += (m - signal_line) * k
     
     histogram = macd_line - signal_line
     
@@ -203,17 +264,17 @@ def bollinger_bands(values: List[float], period: int = 20, std_dev: float = 2.0)
     Returns:
         (upper_band, middle_band, lower_band) or (nan, nan, nan)
     """
-    if not values or len(values) < period:
+    if len(values) == 0 or len(values) < period:
         return (math.nan, math.nan, math.nan)
     
-    middle = sma(values, period)
-    if math.isnan(middle):
+    a = _clean_array(values)
+    if len(a) < period:
         return (math.nan, math.nan, math.nan)
     
-    # Calculate standard deviation
-    recent_values = values[-period:]
-    variance = sum((v - middle) ** 2 for v in recent_values) / period
-    std = math.sqrt(variance)
+    # Mean and population standard deviation of the same window
+    window = a[-period:]
+    middle = float(window.mean())
+    std = float(window.std())
     
     upper = middle + (std_dev * std)
     lower = middle - (std_dev * std)
@@ -221,6 +282,61 @@ def bollinger_bands(values: List[float], period: int = 20, std_dev: float = 2.0)
     return (upper, middle, lower)
 
 
+class RollingMoments:
+    """
+    Running sum and sum of squares over the last n samples, so the window
+    mean/std cost O(1) per new sample instead of a rescan. The sums are
+    recomputed from the window each time it wraps, which bounds float drift.
+    """
+    __slots__ = ('n', 'buf', 'head', 'full', 's', 's2')
+    
+    def __init__(self, n: int):
+        self.n = n
+        self.buf = [0.0] * n
+        self.head = 0
+        self.full = False
+        self.s = 0.0
+        self.s2 = 0.0
+    
+    def push(self, x: float):
+        if x != x:  # NaN samples are skipped, as in sma()
+            return
+        old = self.buf[self.head]
+        self.buf[self.head] = x
+        self.s += x - old
+        self.s2 += x * x - old * old
+        self.head += 1
+        if self.head == self.n:
+            self.head = 0
+            self.full = True
+            self.s = sum(self.buf)
+            self.s2 = sum(v * v for v in self.buf)
+    
+    def mean(self) -> float:
+        return self.s / self.n
+    
+    def std(self) -> float:
+        """Population standard deviation of the window."""
+        m = self.s / self.n
+        return math.sqrt(max(0.0, self.s2 / self.n - m * m))
+
+
+def bollinger_bands_stream(rm: RollingMoments, std_dev: float = 2.0) -> tuple:
+    """
+    bollinger_bands() from a RollingMoments window (period = rm.n).
+    
+    Returns:
+        (upper_band, middle_band, lower_band) or (nan, nan, nan) until the
+        window is full
+    """
+    if not rm.full:
+        return (math.nan, math.nan, math.nan)
+    
+    middle = rm.mean()
+    std = rm.std()
+    return (middle + std_dev * std, middle, middle - std_dev * std)
+
+
 def volume_sma(volumes: List[float], period: int = 20) -> float:
     """
     Simple Moving Average of volume.
@@ -4,19 +4,24 @@ import logging
 import sys
 import time
 import signal
+import multiprocessing
 from datetime import datetime, UTC
 from typing import Set
 
 from config import (
     ENV, DRY_RUN, HEARTBEAT_SEC,
     DASHBOARD_HOST, DASHBOARD_PORT,
+    DASHBOARD_PROCESS, DASHBOARD_SHM_NAME, DASHBOARD_SHM_SIZE,
+    DASHBOARD_SHM_HB_NAME, DASHBOARD_SHM_HB_SIZE,
     LOG_LEVEL,
     IB_MAX_SUBSCRIPTIONS,
     SCANNER_MAX_WARN_THRESHOLD,
 )
 from state_bus import STATE
 from trade_manager import TradeManager
-from dashboard_server import run_dashboard
+from market_data import is_market_hours
+from dashboard_server import run_dashboard, run_dashboard_process, publish_snapshots, publish_heartbeats
+from state_shm import SnapshotWriter
 from scanner_coordinator import SubscriptionManager
 import threading
 
@@ -34,6 +39,8 @@ logger = logging.getLogger(__name__)
 # Globals
 tm: TradeManager = None
 subscription_manager: SubscriptionManager = None
+shm_writer: SnapshotWriter = None
+hb_writer: SnapshotWriter = None
 running = True
 
 def signal_handler(sig, frame):
@@ -86,6 +93,33 @@ def start_dashboard_thread():
     dashboard_thread.start()
     logger.info(f"Dashboard started at http://{DASHBOARD_HOST}:{DASHBOARD_PORT}")
 
+def start_dashboard_process():
+    """Start dashboard in its own process, fed snapshots through shared memory."""
+    global shm_writer, hb_writer
+    shm_writer = SnapshotWriter(DASHBOARD_SHM_NAME, DASHBOARD_SHM_SIZE)
+    hb_writer = SnapshotWriter(DASHBOARD_SHM_HB_NAME, DASHBOARD_SHM_HB_SIZE)
+    threading.Thread(
+        target=publish_snapshots,
+        args=(shm_writer,),
+        daemon=True,
+        name="SnapshotPublisher"
+    ).start()
+    threading.Thread(
+        target=publish_heartbeats,
+        args=(hb_writer,),
+        daemon=True,
+        name="HeartbeatPublisher"
+    ).start()
+    # spawn, not fork: the IB connection and its threads must not be copied
+    dashboard_process = multiprocessing.get_context("spawn").Process(
+        target=run_dashboard_process,
+        args=(DASHBOARD_SHM_NAME, DASHBOARD_SHM_HB_NAME),
+        daemon=True,
+        name="DashboardProcess"
+    )
+    dashboard_process.start()
+    logger.info(f"Dashboard process started at http://{DASHBOARD_HOST}:{DASHBOARD_PORT}")
+
 def main():
     global tm, subscription_manager, running
     
@@ -111,9 +145,12 @@ def main():
         logger.exception("[ERROR] TradeManager failed to start")
         sys.exit(1)
     
-    # Start dashboard in background thread
+    # Start dashboard in background thread (or its own process)
     try:
-        start_dashboard_thread()
+        if DASHBOARD_PROCESS:
+            start_dashboard_process()
+        else:
+            start_dashboard_thread()
         time.sleep(1)  # Give dashboard a moment to start
         logger.info("[OK] Dashboard started")
     except Exception as e:
@@ -158,9 +195,6 @@ def main():
         while running:
             loop_start = time.time()
             
-            # Get current positions for tracking
-            position_symbols = get_position_symbols(tm.ib)
-            
             # TradeManager heartbeat
             try:
                 tm.heartbeat()
@@ -176,16 +210,20 @@ def main():
                 except Exception as e:
                     logger.warning(f"Scanner tick failed: {e}")
             
-            # Update market phase periodically
+            # Update market phase every loop (just the phase - the full
+            # get_market_phase() dict with formatted times isn't needed here)
             try:
-                phase_info = tm.mdb.get_market_phase()
-                STATE.market_phase = phase_info['phase']
+                STATE.market_phase = is_market_hours()[1]
             except Exception as e:
                 pass  # Don't spam logs
             
             # Emit heartbeat log periodically
             if now - last_hb_emit >= HB_EMIT_INTERVAL:
                 hb_seq += 1
+                
+                # Position symbols are only reported here, so only query IB here
+                position_symbols = get_position_symbols(tm.ib)
+                price_count = len(STATE.prices)
                 uptime = int(now - started_at)
                 
                 # Calculate ages
@@ -213,7 +251,7 @@ def main():
                     live_mode=STATE.live_mode,
                     dry_run=STATE.dry_run,
                     loop_lag_ms=STATE.loop_lag_ms,
-                    prices=len(STATE.prices)
+                    prices=price_count
                 )
                 
                 # Get scanner stats
@@ -238,7 +276,7 @@ def main():
                     f"phase={market_phase} | "
                     f"subs={sub_count}/{IB_MAX_SUBSCRIPTIONS} {sub_status} ({sub_breakdown}) | "
                     f"pos={len(position_symbols)} | "
-                    f"prices={len(STATE.prices)} | "
+                    f"prices={price_count} | "
                     f"tick_age={tick_age}s | pos_age={pos_age}s | "
                     f"ib={STATE.ib_connected} | "
                     f"lag={STATE.loop_lag_ms}ms{scanner_stats}"
@@ -271,6 +309,11 @@ def main():
             tm.stop()
             logger.info("[OK] TradeManager stopped")
         
+        if shm_writer:
+            shm_writer.close()
+        if hb_writer:
+            hb_writer.close()
+        
         logger.info("Shutdown complete")
 
 if __name__ == "__main__":
@@ -9,16 +9,58 @@ We must add it before requesting historical data.
 import logging
 import time
 import math
+from dataclasses import dataclass
 from datetime import datetime, time as dt_time
 from typing import Dict, Tuple, Optional, List
 from collections import deque
+from threading import RLock
+
+import numpy as np
 
 from config import *
+from contracts import clear_contract_cache, fix_futures_exchange
+from indicators import RollingMoments
 from state_bus import STATE
 
 logger = logging.getLogger(__name__)
 
 
+class RingBuf:
+    """Fixed-capacity float64 price history; the oldest sample is overwritten
+    once full. Recent windows are array views, not list copies."""
+    __slots__ = ('buf', 'head', 'full', 'n')
+    
+    def __init__(self, n: int):
+        self.buf = np.empty(n, dtype=np.float64)
+        self.head = 0       # next write position
+        self.full = False
+        self.n = n
+    
+    def __len__(self) -> int:
+        return self.n if self.full else self.head
+    
+    def push(self, x: float):
+        self.buf[self.head] = x
+        self.head += 1
+        if self.head == self.n:
+            self.head = 0
+            self.full = True
+    
+    def tail(self, k: int) -> np.ndarray:
+        """Last k samples, oldest first (a view unless the window wraps)."""
+        head = self.head
+        if k <= head:
+            return self.buf[head - k:head]
+        if not self.full:
+            return self.buf[:head]
+        k = min(k, self.n)
+        return np.concatenate((self.buf[self.n - (k - head):], self.buf[:head]))
+    
+    def view(self) -> np.ndarray:
+        """All samples, oldest first."""
+        return self.tail(self.n)
+
+
 def ensure_ib_connected(ib):
     """Ensure IB instance is connected before any requests."""
     if ib is None:
@@ -26,20 +68,25 @@ def ensure_ib_connected(ib):
     if not getattr(ib, "isConnected", lambda: False)():
         try:
             ib.connect(IB_HOST, IB_PORT, clientId=IB_CLIENT_ID)
+            clear_contract_cache()
             logger.info(f"Reconnected to IBKR on {IB_HOST}:{IB_PORT}")
         except Exception as e:
             raise RuntimeError(f"Unable to connect to IBKR: {e}")
 
 
+# Session boundaries from config, parsed once (is_market_hours runs every loop)
+_SESSION_TIMES = tuple(
+    dt_time(*[int(x) for x in t.split(':')])
+    for t in (PREMARKET_START, REGULAR_START, REGULAR_END, AFTERHOURS_END)
+)
+
+
 def is_market_hours() -> Tuple[bool, str]:
     """Check if we're in trading hours and return market phase."""
     now = datetime.now()
     current_time = now.time()
     
-    premarket_start = dt_time(*[int(x) for x in PREMARKET_START.split(':')])
-    regular_start = dt_time(*[int(x) for x in REGULAR_START.split(':')])
-    regular_end = dt_time(*[int(x) for x in REGULAR_END.split(':')])
-    afterhours_end = dt_time(*[int(x) for x in AFTERHOURS_END.split(':')])
+    premarket_start, regular_start, regular_end, afterhours_end = _SESSION_TIMES
     
     if now.weekday() >= 5:
         return (False, 'closed')
@@ -54,6 +101,45 @@ def is_market_hours() -> Tuple[bool, str]:
         return (False, 'closed')
 
 
+@dataclass(slots=True)
+class TrackerEntry:
+    priority: int
+    sub_time: float
+
+
+class SubscriptionTracker:
+    """
+    Priority and subscribe time per symbol.
+    
+    Both fields live in one record so a reader gets them from a single
+    dict lookup.
+    """
+    
+    def __init__(self):
+        self._entries: Dict[str, TrackerEntry] = {}
+    
+    def add(self, symbol: str, priority: int = PRIORITY_SCANNER, sub_time: Optional[float] = None):
+        """Record (or re-prioritize) a subscription."""
+        self._entries[symbol] = TrackerEntry(priority, sub_time if sub_time is not None else time.time())
+    
+    def remove(self, symbol: str):
+        self._entries.pop(symbol, None)
+    
+    def get_entry(self, symbol: str) -> Optional[TrackerEntry]:
+        """Get the tracker record for a symbol, or None if untracked."""
+        return self._entries.get(symbol)
+    
+    def get_priority(self, symbol: str) -> int:
+        """Get a symbol's priority (0 if untracked)."""
+        e = self._entries.get(symbol)
+        return e.priority if e else 0
+    
+    @property
+    def subscription_times(self) -> Dict[str, float]:
+        """{symbol: sub_time} view for older callers."""
+        return {s: e.sub_time for s, e in self._entries.items()}
+
+
 class MarketDataBus:
     """Enhanced market data bus with 24/7 support."""
     
@@ -61,11 +147,19 @@ class MarketDataBus:
         ensure_ib_connected(ib)
         self.ib = ib
         self.tickers: Dict[str, Dict] = {}
-        self.history: Dict[str, deque] = {}
+        self.history: Dict[str, RingBuf] = {}
+        # Ticks ever recorded per symbol (history only keeps the last `window`),
+        # so consumers can fold in just the new ones
+        self.tick_counts: Dict[str, int] = {}
         self.window = int(window)
         self._subs: Dict[str, Tuple] = {}
+        self._sub_count = 0  # len(_subs), maintained under _lock
+        self._tracker = SubscriptionTracker()
         self._last_hist_fetch: Dict[str, float] = {}
         self._bar_data: Dict[str, Dict] = {}
+        # Guards insertions into _subs/tickers so readers on other threads
+        # (dashboard endpoints) can take consistent snapshots
+        self._lock = RLock()
         
         self.extended_hours_enabled = EXTENDED_HOURS_ENABLED
         
@@ -87,9 +181,9 @@ class MarketDataBus:
     def _record_tick(self, symbol: str, px: float, ts: float):
         """Record a price tick and update STATE."""
         self.tickers[symbol] = {"last": px, "ts": ts}
-        self.history[symbol].append(px)
+        self.history[symbol].push(px)
+        self.tick_counts[symbol] = self.tick_counts.get(symbol, 0) + 1
         STATE.mark_tick(symbol, px)
-        STATE.prices[symbol] = {'last': px, 'age': 0}
         self._update_bar_data(symbol, px)
     
     def _update_bar_data(self, symbol: str, price: float):
@@ -100,6 +194,7 @@ class MarketDataBus:
                 'lows': deque(maxlen=100),
                 'closes': deque(maxlen=100),
                 'volumes': deque(maxlen=100),
+                'bb': RollingMoments(20),  # Bollinger window over bar closes
                 'current_bar': {'high': price, 'low': price, 'volume': 0}
             }
         
@@ -119,6 +214,7 @@ class MarketDataBus:
         bar_data['highs'].append(current['high'])
         bar_data['lows'].append(current['low'])
         bar_data['closes'].append(close_price)
+        bar_data['bb'].push(close_price)
         bar_data['volumes'].append(current['volume'])
         
         bar_data['current_bar'] = {
@@ -127,7 +223,7 @@ class MarketDataBus:
             'volume': 0
         }
     
-    def subscribe(self, symbol: str, contract):
+    def subscribe(self, symbol: str, contract, priority: int = PRIORITY_SCANNER):
         """Subscribe to real-time market data."""
         if not symbol or contract is None:
             raise ValueError("subscribe() requires symbol and a valid IB Contract")
@@ -135,8 +231,10 @@ class MarketDataBus:
         ensure_ib_connected(self.ib)
         symbol = symbol.strip().upper()
         
-        self.tickers.setdefault(symbol, {"last": None, "ts": None})
-        self.history.setdefault(symbol, deque(maxlen=self.window))
+        with self._lock:
+            self.tickers.setdefault(symbol, {"last": None, "ts": None})
+            if symbol not in self.history:
+                self.history[symbol] = RingBuf(self.window)
         
         try:
             generic_tick_list = ""
@@ -150,8 +248,11 @@ class MarketDataBus:
                 False,
             )
             
-            self._subs[symbol] = (contract, ticker)
-            STATE.symbols_subscribed.add(symbol)
+            with self._lock:
+                self._subs[symbol] = (contract, ticker)
+                self._sub_count = len(self._subs)
+                self._tracker.add(symbol, priority)
+            STATE.add_subscribed((symbol,))
             
             is_tradable, phase = is_market_hours()
             phase_str = f"({phase} hours)" if is_tradable else "(closed - fallback mode)"
@@ -162,9 +263,144 @@ class MarketDataBus:
             logger.exception(f"Subscribe failed for {symbol}: {e}")
             raise
     
-    def subscribe_with_contract(self, symbol: str, contract):
+    def subscribe_many(self, contracts: Dict[str, object],
+                       priority: int = PRIORITY_SCANNER) -> List[str]:
+        """
+        Subscribe to several symbols in one pass.
+        
+        reqMktData only queues a request on the IB socket, so the requests
+        go out back-to-back; the connection check, market-phase lookup and
+        bookkeeping are done once for the whole batch.
+        
+        Args:
+            contracts: {symbol: qualified IB Contract}
+            priority: Tracker priority for every symbol in the batch
+        
+        Returns:
+            Symbols that were subscribed successfully
+        """
+        ensure_ib_connected(self.ib)
+        
+        generic_tick_list = "375" if self.extended_hours_enabled else ""
+        subscribed = {}
+        
+        for symbol, contract in contracts.items():
+            if not symbol or contract is None:
+                logger.warning(f"subscribe_many: skipping {symbol!r} (no contract)")
+                continue
+            symbol = symbol.strip().upper()
+            try:
+                ticker = self.ib.reqMktData(contract, generic_tick_list, False, False)
+            except Exception as e:
+                logger.warning(f"Subscribe failed for {symbol}: {e}")
+                continue
+            subscribed[symbol] = (contract, ticker)
+        
+        with self._lock:
+            for symbol in subscribed:
+                self.tickers.setdefault(symbol, {"last": None, "ts": None})
+                if symbol not in self.history:
+                    self.history[symbol] = RingBuf(self.window)
+            self._subs.update(subscribed)
+            self._sub_count = len(self._subs)
+            now = time.time()
+            for symbol in subscribed:
+                self._tracker.add(symbol, priority, now)
+        STATE.add_subscribed(subscribed)
+        
+        is_tradable, phase = is_market_hours()
+        phase_str = f"({phase} hours)" if is_tradable else "(closed - fallback mode)"
+        logger.info(f"Subscribed {len(subscribed)}/{len(contracts)} symbols {phase_str}")
+        
+        return list(subscribed)
+    
+    def unsubscribe(self, symbol: str) -> bool:
+        """Cancel market data for a symbol. Returns False if not subscribed."""
+        symbol = symbol.strip().upper()
+        with self._lock:
+            entry = self._subs.pop(symbol, None)
+            self.tickers.pop(symbol, None)
+            self._tracker.remove(symbol)
+            self._sub_count = len(self._subs)
+        if entry is None:
+            return False
+        
+        contract, _ticker = entry
+        try:
+            self.ib.cancelMktData(contract)
+        except Exception as e:
+            logger.warning(f"cancelMktData failed for {symbol}: {e}")
+        STATE.remove_subscribed((symbol,))
+        logger.info(f"Unsubscribed {symbol}")
+        return True
+    
+    def unsubscribe_many(self, symbols) -> List[str]:
+        """Cancel market data for several symbols. Returns those removed."""
+        with self._lock:
+            removed = {}
+            for symbol in symbols:
+                symbol = symbol.strip().upper()
+                entry = self._subs.pop(symbol, None)
+                if entry is not None:
+                    self.tickers.pop(symbol, None)
+                    self._tracker.remove(symbol)
+                    removed[symbol] = entry
+            self._sub_count = len(self._subs)
+        
+        for symbol, (contract, _ticker) in removed.items():
+            try:
+                self.ib.cancelMktData(contract)
+            except Exception as e:
+                logger.warning(f"cancelMktData failed for {symbol}: {e}")
+        STATE.remove_subscribed(removed)
+        
+        if removed:
+            logger.info(f"Unsubscribed {len(removed)} symbols: {', '.join(removed)}")
+        return list(removed)
+    
+    def check_and_cleanup_subscriptions(self, keep, limit: int = IB_MAX_SUBSCRIPTIONS) -> List[str]:
+        """
+        Drop subscriptions over the IB limit, lowest priority then oldest first.
+        
+        Args:
+            keep: Symbols never removed (open positions)
+            limit: Subscription count to trim down to
+        
+        Returns:
+            Symbols that were unsubscribed
+        """
+        with self._lock:
+            excess = len(self._subs) - limit
+            if excess <= 0:
+                return []
+            get_entry = self._tracker.get_entry
+            ranked = []
+            for symbol in self._subs:
+                if symbol in keep:
+                    continue
+                e = get_entry(symbol)
+                ranked.append((e.priority, e.sub_time, symbol) if e else (0, 0.0, symbol))
+        ranked.sort()
+        return self.unsubscribe_many(symbol for _, _, symbol in ranked[:excess])
+    
+    @property
+    def n_subs(self) -> int:
+        """Number of active subscriptions (lock-free read)."""
+        return self._sub_count
+    
+    def snapshot_subs(self) -> Tuple[Tuple[str, Tuple], ...]:
+        """Consistent copy of (symbol, (contract, ticker)) pairs."""
+        with self._lock:
+            return tuple(self._subs.items())
+    
+    def snapshot_tickers(self) -> Tuple[Tuple[str, Dict], ...]:
+        """Consistent copy of (symbol, {last, ts}) pairs."""
+        with self._lock:
+            return tuple(self.tickers.items())
+    
+    def subscribe_with_contract(self, symbol: str, contract, priority: int = PRIORITY_SCANNER):
         """Alias for subscribe()."""
-        return self.subscribe(symbol, contract)
+        return self.subscribe(symbol, contract, priority)
     
     def _live_tick(self, symbol: str) -> Tuple[Optional[float], float]:
         """Get live tick, converting NaN to None."""
@@ -193,59 +429,6 @@ class MarketDataBus:
         self._record_tick(symbol, px, ts)
         return px, ts
     
-    def _fix_contract_exchange(self, contract):
-        """
-        v15D FIX: Ensure contract has exchange field.
-        IB positions sometimes return contracts without exchange,
-        but historical data API requires it!
-        """
-        # Check if exchange is missing
-        exchange = getattr(contract, 'exchange', None)
-        primary_exchange = getattr(contract, 'primaryExchange', None)
-        
-        # If both missing, we need to add it
-        if not exchange and not primary_exchange:
-            sec_type = getattr(contract, 'secType', None)
-            
-            if sec_type == 'FUT':
-                # Map futures by symbol to exchange
-                symbol = getattr(contract, 'symbol', '')
-                
-                exchange_map = {
-                    'NQ': 'CME',
-                    'ES': 'CME',
-                    'RTY': 'CME',
-                    'YM': 'CBOT',
-                    'CL': 'NYMEX',
-                    'GC': 'COMEX',
-                    'ZB': 'CBOT',
-                }
-                
-                correct_exchange = exchange_map.get(symbol)
-                
-                if correct_exchange:
-                    # Create new contract with exchange
-                    from ib_insync import Future
-                    
-                    fixed_contract = Future(
-                        symbol=symbol,
-                        exchange=correct_exchange,
-                        currency=getattr(contract, 'currency', 'USD'),
-                        lastTradeDateOrContractMonth=getattr(contract, 'lastTradeDateOrContractMonth', ''),
-                        multiplier=getattr(contract, 'multiplier', ''),
-                        localSymbol=getattr(contract, 'localSymbol', ''),
-                    )
-                    
-                    # Copy conId if available
-                    if hasattr(contract, 'conId'):
-                        fixed_contract.conId = contract.conId
-                    
-                    logger.info(f"[FIX] Added exchange={correct_exchange} to {symbol} contract")
-                    return fixed_contract
-        
-        # Exchange exists or we're not a future - return as-is
-        return contract
-    
     def _historical_fallback(self, symbol: str):
         """
         Fetch historical data as fallback.
@@ -276,7 +459,7 @@ class MarketDataBus:
             logger.info(f"Fetching historical for {symbol} {phase_str}")
             
             # v15D FIX: Ensure contract has exchange!
-            fixed_contract = self._fix_contract_exchange(contract)
+            fixed_contract = fix_futures_exchange(contract)
             
             # Use the fixed contract with exchange
             bars = self.ib.reqHistoricalData(
@@ -333,13 +516,23 @@ class MarketDataBus:
         if symbol in self.tickers:
             tick_ts = self.tickers[symbol].get('ts', ts)
             age = int(self._now() - tick_ts) if tick_ts else 999
-            STATE.prices[symbol] = {'last': px, 'age': age}
+            STATE.set_price(symbol, px, age)
         
         return px, ts
     
     def get_series(self, symbol: str, n: int) -> List[float]:
         """Get recent price series."""
-        return list(self.history.get(symbol, []))[-n:]
+        h = self.history.get(symbol)
+        return h.tail(n).tolist() if h is not None else []
+    
+    def get_series_np(self, symbol: str, n: int) -> np.ndarray:
+        """get_series() as a float64 array, for numpy-based indicators.
+
+        A copy: tail() may return a view of the ring buffer, which later
+        pushes overwrite.
+        """
+        h = self.history.get(symbol)
+        return h.tail(n).copy() if h is not None else np.empty(0, dtype=np.float64)
     
     def get_bar_series(self, symbol: str, n: int) -> Tuple[List[float], List[float], List[float]]:
         """Get OHLC bar data for indicators."""
@@ -321,7 +321,7 @@ class OptionsScanner:
             )
         
         # Update STATE for dashboard
-        STATE.unusual_options = top_10
+        STATE.update(unusual_options=top_10)
         
         return top_10
     
@@ -24,22 +24,20 @@ class PositionMonitor:
 
     def _alert(self, symbol, direction):
         self._alert_id += 1
-        alerts = STATE.get().get("alerts", [])
-        alerts.append({"id": self._alert_id, "text": f"{symbol} {direction}", "kind": "up" if "UP" in direction else "down"})
-        STATE.update(alerts=alerts)
+        STATE.add_alert(f"{symbol} {direction}", "up" if "UP" in direction else "down", alert_id=self._alert_id)
 
     def tick(self):
         if not self.started:
             return
         rows = []
         for sym in self.symbols:
-            closes = self.md.get_series(sym, max(self.slow*3, 120))
+            closes = self.md.get_series_np(sym, max(self.slow*3, 120))
             highs, lows, bar_closes = self.md.get_bar_series(sym, 60)
-            last = closes[-1] if closes else None
+            last = float(closes[-1]) if len(closes) else None
             f = ema(closes, self.fast)
             s = ema(closes, self.slow)
             atr = true_atr(highs, lows, bar_closes, 14)
-            series = closes[-60:]
+            series = closes[-60:].tolist()
             signal = "HOLD"
             if all(x==x for x in [f, s, atr]) and last is not None:
                 if last > s + self.k_atr*atr and f > s:
@@ -20,7 +20,7 @@ from collections import deque
 from datetime import datetime
 
 from config import *
-from indicators import ema, sma, true_atr, rsi, macd, bollinger_bands
+from indicators import ema, sma, true_atr, rsi, macd, bollinger_bands, bollinger_bands_stream
 from state_bus import STATE
 
 logger = logging.getLogger(__name__)
@@ -372,8 +372,13 @@ class ProfessionalScanner:
                     if earlier_atr > 0 and recent_atr > earlier_atr * 1.2:
                         points += 5.0
             
-            # Bollinger Band width expansion (5 pts)
-            upper, middle, lower = bollinger_bands(closes, 20, 2)
+            # Bollinger Band width expansion (5 pts); MarketDataBus keeps
+            # the 20-bar moments up to date as bars close
+            rm = bar_data.get('bb')
+            if rm is not None:
+                upper, middle, lower = bollinger_bands_stream(rm, 2)
+            else:
+                upper, middle, lower = bollinger_bands(closes, 20, 2)
             if not math.isnan(upper) and not math.isnan(lower) and middle > 0:
                 bb_width = (upper - lower) / middle
                 
@@ -3,7 +3,7 @@ from typing import List, Dict
 
 from ib_insync import ScannerSubscription
 from indicators import ema, true_atr
-from contracts import build_and_qualify
+from contracts import qualify_universe
 from state_bus import STATE
 
 logger = logging.getLogger(__name__)
@@ -21,9 +21,7 @@ class MarketScanner:
 
     def _alert(self, symbol, direction, label):
         self._alert_id += 1
-        alerts = STATE.get().get("alerts", [])
-        alerts.append({"id": self._alert_id, "text": f"{symbol} {direction} ({label})", "kind": "up" if direction=='UP' else "down"})
-        STATE.update(alerts=alerts)
+        STATE.add_alert(f"{symbol} {direction} ({label})", "up" if direction=='UP' else "down", alert_id=self._alert_id)
 
     def _scan_once(self) -> List[Dict]:
         cands = []
@@ -32,11 +30,12 @@ class MarketScanner:
             try:
                 sub = ScannerSubscription(instrument=instr, locationCode=loc, scanCode=code)
                 rows = self.ib.reqScannerData(sub)
-                for r in rows:
-                    sym = getattr(r.contractDetails.contract, "symbol", None)
+                syms = [getattr(r.contractDetails.contract, "symbol", None) for r in rows]
+                qualified = {c.symbol: c for c in qualify_universe(self.ib, filter(None, syms))}
+                for sym in syms:
                     if not sym:
                         continue
-                    qc = build_and_qualify(self.ib, sym)
+                    qc = qualified.get(sym)
                     if not qc:
                         continue
                     key = sym.upper()
@@ -45,11 +44,11 @@ class MarketScanner:
                             self.md.subscribe_with_contract(key, qc)
                         except Exception:
                             continue
-                    closes = self.md.get_series(key, 200)
+                    closes = self.md.get_series_np(key, 200)
                     highs, lows, bar_closes = self.md.get_bar_series(key, 60)
                     if len(closes) < 50 or len(bar_closes) < 15:
                         continue
-                    last = closes[-1]
+                    last = float(closes[-1])
                     f = ema(closes, 8)
                     s = ema(closes, 21)
                     atr = true_atr(highs, lows, bar_closes, 14)
@@ -4,7 +4,7 @@ from typing import List, Dict
 
 from ib_insync import ScannerSubscription
 from indicators import ema, true_atr
-from contracts import build_and_qualify
+from contracts import qualify_universe
 from state_bus import STATE
 from config import (
     MAX_IB_SUBSCRIPTIONS,
@@ -31,13 +31,11 @@ class MarketScanner:
 
     def _alert(self, symbol, direction, label):
         self._alert_id += 1
-        alerts = STATE.get().get("alerts", [])
-        alerts.append({
-            "id": self._alert_id, 
-            "text": f"{symbol} {direction} ({label})", 
-            "kind": "up" if direction=='UP' else "down"
-        })
-        STATE.update(alerts=alerts)
+        STATE.add_alert(
+            f"{symbol} {direction} ({label})",
+            "up" if direction=='UP' else "down",
+            alert_id=self._alert_id,
+        )
 
     def _get_position_symbols(self) -> set:
         """Get current position symbols to reserve capacity."""
@@ -76,21 +74,22 @@ class MarketScanner:
             try:
                 sub = ScannerSubscription(instrument=instr, locationCode=loc, scanCode=code)
                 rows = self.ib.reqScannerData(sub)
+                syms = [getattr(r.contractDetails.contract, "symbol", None) for r in rows]
+                qualified = {c.symbol: c for c in qualify_universe(self.ib, filter(None, syms))}
                 
                 subscribed_count = 0
                 
-                for r in rows:
+                for sym in syms:
                     # Check capacity before each subscription
                     current_subs = len(self.md._subs)
                     if current_subs >= MAX_IB_SUBSCRIPTIONS:
                         logger.warning(f"Hit subscription limit during {label} scan")
                         break
                     
-                    sym = getattr(r.contractDetails.contract, "symbol", None)
                     if not sym:
                         continue
                     
-                    qc = build_and_qualify(self.ib, sym)
+                    qc = qualified.get(sym)
                     if not qc:
                         continue
                     
@@ -108,13 +107,13 @@ class MarketScanner:
                     
                     # Analyze for breakout signals
                     try:
-                        closes = self.md.get_series(key, 200)
+                        closes = self.md.get_series_np(key, 200)
                         highs, lows, bar_closes = self.md.get_bar_series(key, 60)
                         
                         if len(closes) < 50 or len(bar_closes) < 15:
                             continue
                         
-                        last = closes[-1]
+                        last = float(closes[-1])
                         f = ema(closes, 8)
                         s = ema(closes, 21)
                         atr = true_atr(highs, lows, bar_closes, 14)
@@ -68,8 +68,8 @@ class BreakoutScanner:
             symbols_or_contracts: List of symbol strings or IB Contracts
             position_symbols: Set of symbols with open positions (always included)
         """
-        if position_symbols is None:
-            position_symbols = set()
+        # Callers may pass a list; membership is tested per symbol below
+        position_symbols = frozenset(position_symbols or ())
         
         # Extract symbols
         new_symbols = []
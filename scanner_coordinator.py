@@ -13,6 +13,7 @@ from collections import defaultdict
 from ib_insync import Stock, Future
 
 from config import *
+from contracts import qualify_nearest_futures
 from state_bus import STATE
 from professional_scanner import ProfessionalScanner
 
@@ -101,7 +102,7 @@ class SubscriptionManager:
                 return False
         
         try:
-            self.market_bus.subscribe(symbol, contract)
+            self.market_bus.subscribe(symbol, contract, priority)
             self._subscriptions[symbol] = {
                 'priority': priority,
                 'contract': contract,
@@ -212,32 +213,30 @@ class SubscriptionManager:
         Sync futures watchlist using root symbols.
         Subscribe to continuous contracts for monitoring.
         """
+        pending = []
         for root_symbol in FUTURES_WATCHLIST:
             # Skip if already subscribed (from positions)
             if root_symbol in self._subscriptions:
                 self._subscriptions[root_symbol]['last_activity'] = time.time()
                 continue
-            
+            pending.append(root_symbol)
+        
+        if not pending:
+            return
+        
+        # Resolve all front-month contracts in one batched round-trip
+        nearest = qualify_nearest_futures(self.ib, pending)
+        
+        for root_symbol in pending:
             try:
-                # Map to correct exchange
-                exchange_map = {
-                    'NQ': 'CME', 'ES': 'CME', 'RTY': 'CME',
-                    'CL': 'NYMEX', 'GC': 'COMEX',
-                    'ZB': 'CBOT', 'YM': 'CBOT'
-                }
-                exchange = exchange_map.get(root_symbol, 'CME')
-                
-                # Create continuous contract (empty expiry = front month)
-                contract = Future(root_symbol, exchange=exchange, currency='USD')
-                
-                # Try to qualify
-                try:
-                    qualified = self.ib.qualifyContracts(contract)
-                    if qualified and len(qualified) > 0:
-                        contract = qualified[0]
-                        logger.info(f"Qualified {root_symbol} -> {contract.localSymbol}")
-                except Exception as e:
+                contract = nearest.get(root_symbol)
+                if contract is not None:
+                    logger.info(f"Qualified {root_symbol} -> {contract.localSymbol}")
+                else:
+                    # Fall back to an unqualified root contract
                     logger.debug(f"Qualification failed for {root_symbol}, using unqualified")
+                    exchange, _ = futures_meta(root_symbol)
+                    contract = Future(root_symbol, exchange=exchange, currency='USD')
                 
                 # Subscribe with FUTURES priority
                 self._subscribe(root_symbol, contract, PRIORITY_FUTURES)
@@ -254,7 +253,7 @@ class SubscriptionManager:
             
             if not top_stocks:
                 logger.info(f"No stocks qualified (need {SCANNER_MIN_SCORE}+ score)")
-                STATE.scanner_results = []
+                STATE.update(scanner_results=[])
                 return
             
             available = self._get_current_capacity()
@@ -289,11 +288,11 @@ class SubscriptionManager:
                 if symbol not in current_scanner_symbols:
                     self._unsubscribe(symbol)
             
-            STATE.scanner_results = stocks_to_subscribe
+            STATE.update(scanner_results=stocks_to_subscribe)
             
         except Exception as e:
             logger.error(f"Stock scanner error: {e}", exc_info=True)
-            STATE.scanner_results = []
+            STATE.update(scanner_results=[])
     
     def _cleanup_stale(self):
         """Remove stale subscriptions."""
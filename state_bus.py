@@ -1,8 +1,17 @@
 # state_bus.py - v15 compatible (with v14 backward compatibility)
+import re
 from dataclasses import dataclass, asdict, field
-from time import time
+from time import time, monotonic
 from typing import Dict, Set, Optional, Any
-from threading import RLock
+from threading import Condition, RLock
+
+from config import FUTURES_WATCHLIST
+
+try:
+    import numpy as np
+    _NUMPY_AVAILABLE = True
+except Exception:
+    _NUMPY_AVAILABLE = False
 
 @dataclass
 class Heartbeat:
@@ -18,6 +27,93 @@ class Heartbeat:
     loop_lag_ms: Optional[int] = None
     symbols: int = 0
 
+@dataclass(slots=True)
+class Quote:
+    """Latest price for one symbol, as kept in StateBus.prices."""
+    last: Optional[float] = None
+    age: int = 999
+
+# Shared stand-in for symbols with no quote yet (never mutated)
+EMPTY_QUOTE = Quote()
+
+# Dated watchlist contract -> root, e.g. NQZ5 / NQZ25 -> NQ. One compiled
+# alternation over the (static) watchlist, longest roots first.
+_ROOT_RE = re.compile(
+    '(' + '|'.join(map(re.escape, sorted(FUTURES_WATCHLIST, key=len, reverse=True))) + ')'
+    r'[FGHJKMNQUVXZ]\d{1,2}'
+)
+
+def _futures_root(symbol: str, _match=_ROOT_RE.fullmatch) -> Optional[str]:
+    """Watchlist root of a dated futures symbol, or None for anything else."""
+    m = _match(symbol)
+    return m.group(1) if m else None
+
+def _position_row(symbol: str, pos: Dict, quote: Quote) -> Dict[str, Any]:
+    """Dashboard row for one position, with P&L at quote.last."""
+    last = quote.last
+    age = quote.age
+    # Coerce missing/None fields so a bad row can't raise inside a tick
+    qty = pos.get('qty') or 0
+    avg_cost = pos.get('avg') or 0
+    multiplier = pos.get('multiplier') or 1
+
+    if last and avg_cost:
+        pnl = (last - avg_cost) * qty * multiplier
+        pnl_pct = ((last / avg_cost) - 1) * 100 if avg_cost > 0 else 0
+    else:
+        pnl = 0
+        pnl_pct = 0
+
+    return {
+        'symbol': symbol,
+        'qty': qty,
+        'avg': avg_cost,
+        'last': last,
+        'pnl': pnl,
+        'pnl_pct': pnl_pct,
+        'sec_type': pos.get('sec_type', 'STK'),
+        'multiplier': multiplier,
+        'age': age,
+    }
+
+def _position_rows(positions: Dict[str, Dict], prices: Dict[str, Quote]) -> list:
+    """_position_row() for every position, with P&L computed as array ops."""
+    items = list(positions.items())
+    n = len(items)
+    prices_get = prices.get
+    quotes = [prices_get(symbol, EMPTY_QUOTE) for symbol, _ in items]
+    lasts = [q.last for q in quotes]
+
+    last = np.fromiter((0.0 if x is None else x for x in lasts), float, n)
+    qtys = [pos.get('qty') or 0 for _, pos in items]
+    avgs = [pos.get('avg') or 0 for _, pos in items]
+    mults = [pos.get('multiplier') or 1 for _, pos in items]
+    qty = np.fromiter(qtys, float, n)
+    avg = np.fromiter(avgs, float, n)
+    mult = np.fromiter(mults, float, n)
+
+    # Same rule as `if last and avg_cost` (None counts as 0, NaN passes)
+    valid = (last != 0) & (avg != 0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        pnl = np.where(valid, (last - avg) * qty * mult, 0.0)
+        pnl_pct = np.where(valid & (avg > 0), (last / avg - 1) * 100, 0.0)
+
+    return [
+        {
+            'symbol': symbol,
+            'qty': qt,
+            'avg': av,
+            'last': l,
+            'pnl': p,
+            'pnl_pct': pct,
+            'sec_type': pos.get('sec_type', 'STK'),
+            'multiplier': m,
+            'age': q.age,
+        }
+        for (symbol, pos), q, l, qt, av, m, p, pct
+        in zip(items, quotes, lasts, qtys, avgs, mults, pnl.tolist(), pnl_pct.tolist())
+    ]
+
 class StateBus:
     """
     Thread-safe singleton state bus for sharing data between components.
@@ -27,19 +123,27 @@ class StateBus:
     def __init__(self):
         self._lock = RLock()  # Thread safety
         self.started_at: float = time()
+        self._start_mono: float = monotonic()  # immune to wall-clock jumps
         self.last_tick_at: Optional[float] = None
         self.last_pos_sync_at: Optional[float] = None
         self.symbols_subscribed: Set[str] = set()
+        self.futures_root_to_contract: Dict[str, str] = {}  # NQ -> NQZ5
         self.ib_connected: bool = False
         self.live_mode: bool = False
         self.dry_run: bool = True
         self.loop_lag_ms: Optional[int] = None
         self.pnl_today: float = 0.0
         self.open_orders: int = 0
-        self.prices: Dict[str, float] = {}
+        self.prices: Dict[str, Quote] = {}
         self.ema8: Dict[str, float] = {}
         self.ema21: Dict[str, float] = {}
         self.positions_rows: list[dict] = []
+        # Dashboard position rows with P&L, kept current by set_price() and
+        # rebuilt whenever positions_rows is replaced. Rows are never mutated
+        # in place, so a shallow copy of the list is a consistent view.
+        self.positions_snapshot: list[dict] = []
+        self.positions_total_pnl: float = 0.0
+        self._pos_slots: Dict[str, int] = {}  # symbol -> index in positions_snapshot
         self.breakouts: list[dict] = []
         self.alerts: list[dict] = []
         self.heartbeat: Heartbeat = Heartbeat()
@@ -48,6 +152,12 @@ class StateBus:
         self.market_phase: str = "unknown"
         self.scanner_results: list[dict] = []
         self.unusual_options: list[dict] = []
+        
+        # Bumped by the mutation helpers so readers can reuse derived data
+        # (e.g. serialized dashboard responses) while a field is unchanged
+        self._version: int = 0
+        self._field_versions: Dict[str, int] = {}
+        self._changed = Condition(self._lock)  # notified on every _bump
 
     # --- v15 compatibility: positions property ---
     @property
@@ -64,17 +174,96 @@ class StateBus:
                     positions_dict[symbol] = row
             return positions_dict
 
+    # --- versioning ---
+    def _bump(self, *fields: str):
+        """Advance the global and per-field versions (caller holds _lock)."""
+        self._version += 1
+        fv = self._field_versions
+        for f in fields:
+            fv[f] = fv.get(f, 0) + 1
+        self._changed.notify_all()
+
+    def version(self, field: Optional[str] = None) -> int:
+        """Get the state version, or one field's version if given."""
+        if field is None:
+            return self._version
+        return self._field_versions.get(field, 0)
+
+    def wait_version(self, since: Optional[int], timeout: Optional[float] = None) -> int:
+        """Block until the version differs from `since` (or timeout); return it."""
+        with self._changed:
+            self._changed.wait_for(lambda: self._version != since, timeout)
+            return self._version
+
+    # --- positions snapshot ---
+    def _rebuild_positions_snapshot(self):
+        """Recompute every dashboard position row (caller holds _lock)."""
+        positions = self.positions
+        if _NUMPY_AVAILABLE:
+            rows = _position_rows(positions, self.prices)
+        else:
+            prices_get = self.prices.get
+            rows = [_position_row(symbol, pos, prices_get(symbol, EMPTY_QUOTE))
+                    for symbol, pos in positions.items()]
+        self.positions_snapshot = rows
+        self.positions_total_pnl = sum(r['pnl'] for r in rows)
+        self._pos_slots = {r['symbol']: i for i, r in enumerate(rows)}
+
+    def _reprice_position(self, symbol: str):
+        """Refresh one position row after its price changed (caller holds _lock)."""
+        i = self._pos_slots.get(symbol)
+        if i is None:
+            return
+        old = self.positions_snapshot[i]
+        row = _position_row(symbol, old, self.prices[symbol])
+        self.positions_snapshot[i] = row
+        self.positions_total_pnl += row['pnl'] - old['pnl']
+
+    # --- subscriptions ---
+    def add_subscribed(self, symbols):
+        """Record subscribed symbols and index any futures by root."""
+        with self._lock:
+            roots = self.futures_root_to_contract
+            for symbol in symbols:
+                self.symbols_subscribed.add(symbol)
+                root = _futures_root(symbol)
+                if root:
+                    roots[root] = symbol
+
+    def remove_subscribed(self, symbols):
+        """Forget unsubscribed symbols and their futures root entries."""
+        with self._lock:
+            roots = self.futures_root_to_contract
+            for symbol in symbols:
+                self.symbols_subscribed.discard(symbol)
+                root = _futures_root(symbol)
+                if root and roots.get(root) == symbol:
+                    del roots[root]
+
     # --- mutation helpers ---
     def mark_tick(self, symbol: str, price: float):
         """Thread-safe tick marker."""
         with self._lock:
-            self.prices[symbol] = float(price)
+            self.prices[symbol] = Quote(float(price), 0)
             self.last_tick_at = time()
+            self._reprice_position(symbol)
+            self._bump("prices")
+
+    def set_price(self, symbol: str, last: Optional[float], age: int):
+        """Thread-safe price/age update (no tick timestamp)."""
+        quote = Quote(last, age)
+        with self._lock:
+            if self.prices.get(symbol) == quote:
+                return
+            self.prices[symbol] = quote
+            self._reprice_position(symbol)
+            self._bump("prices")
 
     def mark_pos_sync(self):
         """Thread-safe position sync marker."""
         with self._lock:
             self.last_pos_sync_at = time()
+            self._bump("last_pos_sync_at")
 
     def update(self, **kwargs):
         """Thread-safe state update."""
@@ -82,9 +271,14 @@ class StateBus:
             # Basic shallow update for known fields
             for k, v in kwargs.items():
                 if k == "subs_symbols" and isinstance(v, set):
-                    self.symbols_subscribed = set(v)
+                    self.symbols_subscribed = set()
+                    self.futures_root_to_contract = {}
+                    self.add_subscribed(v)
                 elif hasattr(self, k):
                     setattr(self, k, v)
+            if "positions_rows" in kwargs:
+                self._rebuild_positions_snapshot()
+            self._bump(*kwargs)
 
     def update_heartbeat(self, **kwargs):
         """Thread-safe heartbeat update."""
@@ -110,11 +304,11 @@ class StateBus:
                 symbols=int(kwargs.get("prices", len(self.prices))),
             )
             self.heartbeat = hb
+            self._bump("heartbeat")
 
     def uptime_seconds(self) -> int:
-        """Get uptime in seconds."""
-        with self._lock:
-            return int(time() - self.started_at)
+        """Get uptime in seconds (lock-free: _start_mono never changes)."""
+        return int(monotonic() - self._start_mono)
 
     # --- views ---
     def snapshot(self) -> Dict[str, Any]:
@@ -130,7 +324,7 @@ class StateBus:
             "positions": list(self.positions_rows),  # Copy to avoid mutation
             "breakouts": list(self.breakouts),
             "alerts": list(self.alerts),
-            "prices": dict(self.prices),
+            "prices": self.get_prices(),
             "ema8": dict(self.ema8),
             "ema21": dict(self.ema21),
             "heartbeat": asdict(self.heartbeat),
@@ -144,21 +338,59 @@ class StateBus:
         with self._lock:
             return self.snapshot()
 
+    def status_ctx(self) -> Dict[str, Any]:
+        """Dashboard status fields, read in one pass under the lock."""
+        with self._lock:
+            return {
+                "ib_connected": self.ib_connected,
+                "market_phase": self.market_phase,
+                "subscriptions": len(self.symbols_subscribed),
+                # Same count as len(self.positions), without building the dict
+                "positions": len({row['symbol'] for row in self.positions_rows if row.get('symbol')}),
+            }
+
+    def get_positions_snapshot(self) -> Dict[str, Any]:
+        """Precomputed dashboard positions payload (no per-call P&L math)."""
+        with self._lock:
+            return {
+                "positions": list(self.positions_snapshot),
+                "total_pnl": self.positions_total_pnl,
+                "count": len(self.positions_snapshot),
+            }
+
+    def get_prices(self) -> Dict[str, Dict[str, Any]]:
+        """Thread-safe copy of prices as plain {symbol: {last, age}} dicts."""
+        with self._lock:
+            return {symbol: asdict(q) for symbol, q in self.prices.items()}
+
+    def get_heartbeat(self) -> Dict[str, Any]:
+        """Thread-safe copy of just the heartbeat (no full snapshot)."""
+        with self._lock:
+            return asdict(self.heartbeat)
+
+    def get_alerts(self) -> list:
+        """Thread-safe copy of just the alerts list (no full snapshot)."""
+        with self._lock:
+            return list(self.alerts)
+
     def clear_alerts(self):
         """Clear all alerts."""
         with self._lock:
             self.alerts = []
+            self._bump("alerts")
 
-    def add_alert(self, text: str, kind: str = "info"):
-        """Add a new alert."""
+    def add_alert(self, text: str, kind: str = "info", alert_id: Optional[int] = None):
+        """Add a new alert (appended in place; no copy of the alerts list)."""
         with self._lock:
-            alert_id = len(self.alerts) + 1
+            if alert_id is None:
+                alert_id = len(self.alerts) + 1
             self.alerts.append({
                 "id": alert_id,
                 "text": text,
                 "kind": kind,
                 "timestamp": time()
             })
+            self._bump("alerts")
 
 # Global singleton
 STATE = StateBus()
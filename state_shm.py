@@ -0,0 +1,79 @@
+# state_shm.py - dashboard snapshot handoff through shared memory
+"""
+Lets the dashboard run in its own process. The trading process publishes
+the serialized /api/snapshot body into a named SharedMemory block and the
+dashboard process copies it back out - no pickling, no Manager proxy, and
+no GIL shared with the IB/strategy loops.
+
+Block layout: 16-byte header (seq: u64, length: u32, pad) then the body.
+seq is odd while a write is in progress; readers retry until they see the
+same even seq before and after copying the body (a seqlock).
+"""
+
+import logging
+import struct
+import time
+from multiprocessing import shared_memory
+
+logger = logging.getLogger(__name__)
+
+_HEADER = struct.Struct('<QI4x')
+
+
+class SnapshotWriter:
+    """Single producer: owns (creates and unlinks) the shared block."""
+
+    def __init__(self, name: str, size: int):
+        try:
+            self.shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        except FileExistsError:
+            # Left behind by a run that did not shut down cleanly
+            stale = shared_memory.SharedMemory(name=name)
+            stale.close()
+            stale.unlink()
+            self.shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        self._seq = 0
+        _HEADER.pack_into(self.shm.buf, 0, 0, 0)
+
+    def publish(self, body: bytes) -> bool:
+        """Replace the published body. False if it does not fit the block."""
+        n = len(body)
+        end = _HEADER.size + n
+        if end > self.shm.size:
+            logger.warning(f"Snapshot of {n} bytes exceeds shared block ({self.shm.size}); not published")
+            return False
+        buf = self.shm.buf
+        _HEADER.pack_into(buf, 0, self._seq + 1, n)  # odd: write in progress
+        buf[_HEADER.size:end] = body
+        self._seq += 2
+        _HEADER.pack_into(buf, 0, self._seq, n)
+        return True
+
+    def close(self):
+        self.shm.close()
+        self.shm.unlink()
+
+
+class SnapshotReader:
+    """Any number of readers, in any process, attached by name."""
+
+    def __init__(self, name: str):
+        self.shm = shared_memory.SharedMemory(name=name)
+
+    def seq(self) -> int:
+        """Current sequence number; changes whenever a new body is published."""
+        return _HEADER.unpack_from(self.shm.buf, 0)[0]
+
+    def read(self) -> tuple:
+        """(seq, body) of the latest complete publish (seq 0: nothing yet)."""
+        buf = self.shm.buf
+        while True:
+            seq, n = _HEADER.unpack_from(buf, 0)
+            if not seq & 1:
+                body = bytes(buf[_HEADER.size:_HEADER.size + n])
+                if _HEADER.unpack_from(buf, 0)[0] == seq:
+                    return seq, body
+            time.sleep(0)
+
+    def close(self):
+        self.shm.close()
@@ -1,10 +1,9 @@
 import logging
 import math
-import time
 from typing import List
 
 from config import QUOTE_STALE_SEC
-from data_guard import StalenessGuard
+from data_guard import StalenessGuard, refresh_now
 
 logger = logging.getLogger(__name__)
 
@@ -35,21 +34,25 @@ class EMACrossover:
         self.guard = StalenessGuard(QUOTE_STALE_SEC)
         self.positions = {}  # sym -> qty (stub logic)
 
-        self._last_bar_ts = 0
+        self._last_bar_ns = 0                   # wall ns (data_guard clock)
         self.min_bar_sec = 2                    # evaluate at most every 2s
         self.warmup = max(self.slow * 3, 60)    # need at least this many samples
 
     def on_bar(self):
-        now = time.time()
-        if now - self._last_bar_ts < self.min_bar_sec:
+        now = refresh_now()
+        if now - self._last_bar_ns < self.min_bar_sec * 1_000_000_000:
             return
-        self._last_bar_ts = now
+        self._last_bar_ns = now
 
-        # Evaluate all subscribed symbols
-        for sym in list(self.md.tickers.keys()):
-            price, ts = self.md.get_last(sym)
-            self.guard.on_tick(sym, ts)
-            if not self.guard.is_fresh(sym):
+        # Evaluate all subscribed symbols; staleness is checked in one
+        # vectorized pass after recording every tick
+        syms = list(self.md.tickers.keys())
+        quotes = [self.md.get_last(sym) for sym in syms]
+        self.guard.on_ticks(syms, [ts for _, ts in quotes])
+        fresh = self.guard.fresh_mask(syms)
+
+        for sym, (price, ts), ok in zip(syms, quotes, fresh):
+            if not ok:
                 logger.debug(f"Skip {sym}: stale")
                 continue
 
@@ -1,11 +1,11 @@
 # trade_manager.py — v15D FIX: Add exchange to futures contracts before subscribing
-import logging, time, math
-from typing import Dict, List, Tuple
+import logging, time
+from typing import Dict, List, Optional, Tuple
 from state_bus import STATE
 from ib_client import IBClient, Contract
 from market_data import MarketDataBus
-from indicators import ema
-from config import PRIORITY_POSITION, FUTURES_EXCHANGES
+from indicators import StreamingEMA
+from config import PRIORITY_POSITION
 
 logger = logging.getLogger(__name__)
 
@@ -20,6 +20,8 @@ class TradeManager:
         self.ib = None
         self.mdb: MarketDataBus = None
         self.positions: Dict[str, Dict] = {}
+        # {symbol: [ticks folded in, EMA8, EMA21]}, advanced only by new ticks
+        self._emas: Dict[str, list] = {}
         self._last_pos_sync = 0.0
         self._warmup_end = 0.0
 
@@ -58,53 +60,9 @@ class TradeManager:
         except Exception as e:
             logger.warning(f"TradeManager stop error: {e}")
 
-    def _fix_futures_contract(self, contract):
-        """
-        v15D FIX: Add exchange to futures contracts if missing.
-        IB positions() sometimes returns contracts without exchange field.
-        """
-        from ib_insync import Future
-        
-        sec_type = getattr(contract, 'secType', None)
-        
-        if sec_type != 'FUT':
-            return contract  # Not a future, return as-is
-        
-        # Check if exchange already set
-        exchange = getattr(contract, 'exchange', None)
-        primary_exchange = getattr(contract, 'primaryExchange', None)
-        
-        if exchange and exchange != '':
-            return contract  # Already has exchange
-        
-        # Get symbol and look up exchange
-        symbol = getattr(contract, 'symbol', '')
-        correct_exchange = FUTURES_EXCHANGES.get(symbol)
-        
-        if not correct_exchange:
-            logger.warning(f"No exchange mapping for futures {symbol}")
-            return contract
-        
-        # Create new contract with exchange
-        fixed_contract = Future(
-            symbol=symbol,
-            exchange=correct_exchange,
-            currency=getattr(contract, 'currency', 'USD'),
-            lastTradeDateOrContractMonth=getattr(contract, 'lastTradeDateOrContractMonth', ''),
-            multiplier=getattr(contract, 'multiplier', ''),
-            localSymbol=getattr(contract, 'localSymbol', ''),
-        )
-        
-        # Preserve conId if available
-        if hasattr(contract, 'conId'):
-            fixed_contract.conId = contract.conId
-        
-        logger.info(f"[FIX] Added exchange={correct_exchange} to {symbol} contract")
-        return fixed_contract
-
     def _sync_positions(self, initial: bool = False):
         """Sync positions from IB and update subscriptions."""
-        from contracts import looks_nontradable_symbol, get_contract_multiplier
+        from contracts import looks_nontradable_symbol, get_contract_multiplier, fix_futures_exchange
         
         try:
             rows = self.ibc.fetch_positions()
@@ -114,38 +72,44 @@ class TradeManager:
             
             new_syms = []
             skipped = []
+            to_subscribe = {}
             
             for r in rows:
-                sym = r["symbol"]
+                sym = r.symbol
                 
                 if looks_nontradable_symbol(sym):
                     skipped.append(sym)
                     logger.info(f"Skipping non-tradable: {sym}")
                     continue
                 
-                multiplier = get_contract_multiplier(r["contract"])
+                multiplier = get_contract_multiplier(r.contract)
                 
                 # Store position data
                 self.positions[sym] = {
-                    "qty": r["qty"],
-                    "avg": r["avgCost"],
-                    "contract": r["contract"],
-                    "sec_type": r.get("sec_type", "STK"),
-                    "local_symbol": r.get("local_symbol", sym),
+                    "qty": r.qty,
+                    "avg": r.avgCost,
+                    "contract": r.contract,
+                    "sec_type": r.sec_type,
+                    "local_symbol": r.local_symbol,
                     "multiplier": multiplier,
                 }
                 new_syms.append(sym)
                 
-                # Subscribe if not already subscribed
+                # Queue subscription if not already subscribed
                 if sym not in self.mdb._subs:
                     try:
                         # v15D FIX: Fix futures contract BEFORE subscribing!
-                        fixed_contract = self._fix_futures_contract(r["contract"])
-                        
-                        self.mdb.subscribe(sym, fixed_contract)
-                        logger.info(f"Subscribed to {sym} (POSITION priority)")
+                        to_subscribe[sym] = fix_futures_exchange(r.contract)
                     except Exception as e:
-                        logger.warning(f"Subscribe failed for {sym}: {e}")
+                        logger.warning(f"Contract fix failed for {sym}: {e}")
+            
+            # Subscribe all new positions in one batch
+            if to_subscribe:
+                try:
+                    subscribed = self.mdb.subscribe_many(to_subscribe, priority=PRIORITY_POSITION)
+                    logger.info(f"Subscribed to {', '.join(subscribed)} (POSITION priority)")
+                except Exception as e:
+                    logger.warning(f"Batch subscribe failed: {e}")
             
             self._last_pos_sync = time.time()
             STATE.mark_pos_sync()
@@ -163,20 +127,7 @@ class TradeManager:
                     logger.debug(f"get_last failed for {sym}: {e}")
                     last = None
                 
-                # Calculate EMAs
-                ema8_val = None
-                ema21_val = None
-                try:
-                    closes = self.mdb.get_series(sym, 50)
-                    if len(closes) >= 21:
-                        ema8_val = ema(closes, 8)
-                        ema21_val = ema(closes, 21)
-                        if ema8_val is not None and math.isnan(ema8_val):
-                            ema8_val = None
-                        if ema21_val is not None and math.isnan(ema21_val):
-                            ema21_val = None
-                except Exception as e:
-                    logger.debug(f"EMA calc failed for {sym}: {e}")
+                ema8_val, ema21_val = self._ema_values(sym)
                 
                 # Adjust avg cost for display
                 avg_display = p["avg"]
@@ -196,7 +147,7 @@ class TradeManager:
                     "contract": p["contract"],
                 })
             
-            STATE.positions_rows = pos_rows
+            STATE.update(positions_rows=pos_rows)
             
             if rows:
                 logger.debug(f"Position sync complete: {len(rows)} positions")
@@ -204,6 +155,24 @@ class TradeManager:
         except Exception as e:
             logger.warning(f"Position sync failed: {e}")
 
+    def _ema_values(self, sym: str) -> Tuple[Optional[float], Optional[float]]:
+        """(EMA8, EMA21) for sym, folding in only ticks recorded since the
+        last call; (None, None) until 21 samples have been seen."""
+        state = self._emas.get(sym)
+        if state is None:
+            state = self._emas[sym] = [0, StreamingEMA(8), StreamingEMA(21)]
+        seen, e8, e21 = state
+        new = self.mdb.tick_counts.get(sym, 0) - seen
+        if new > 0:
+            # Python floats: the fold below is per sample
+            for px in self.mdb.get_series_np(sym, new).tolist():
+                e8.update(px)
+                e21.update(px)
+            state[0] = seen + new
+        if not e21.warm:
+            return None, None
+        return e8.v, e21.v
+
     def heartbeat(self):
         """Main heartbeat loop."""
         now = time.time()
@@ -226,19 +195,7 @@ class TradeManager:
                 except Exception:
                     last = None
                 
-                ema8_val = None
-                ema21_val = None
-                try:
-                    closes = self.mdb.get_series(sym, 50)
-                    if len(closes) >= 21:
-                        ema8_val = ema(closes, 8)
-                        ema21_val = ema(closes, 21)
-                        if ema8_val is not None and math.isnan(ema8_val):
-                            ema8_val = None
-                        if ema21_val is not None and math.isnan(ema21_val):
-                            ema21_val = None
-                except Exception as e:
-                    logger.debug(f"EMA calc failed for {sym}: {e}")
+                ema8_val, ema21_val = self._ema_values(sym)
                 
                 avg_display = p["avg"]
                 if p["sec_type"] == "FUT" and p["multiplier"] > 1:
@@ -258,7 +215,7 @@ class TradeManager:
                 })
             
             if out:
-                STATE.positions_rows = out
+                STATE.update(positions_rows=out)
                 
         except Exception as e:
             logger.debug(f"Heartbeat pricing update failed: {e}")
@@ -271,7 +228,7 @@ class TradeManager:
             "pnl_today": STATE.pnl_today,
             "open_orders": STATE.open_orders,
             "subscriptions": subs,
-            "prices": dict(STATE.prices),
+            "prices": STATE.get_prices(),
             "ema8": dict(STATE.ema8),
             "ema21": dict(STATE.ema21),
             "positions": STATE.positions_rows,